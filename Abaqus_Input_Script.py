@@ -1,27 +1,39 @@
 from abaqusConstants import *
+import gzip
+import os
+
+
+def Open_Mesh_File(path):
+    # The file, or the path + '.gz' written by DomeGenerator --compress,
+    # decompressed a block at a time as its lines are read. Both are read
+    # as text, so the lines are str either way.
+    if not os.path.exists(path) and os.path.exists(path + '.gz'):
+        return gzip.open(path + '.gz', 'rt')
+    return open(path, 'rt')
 
 
 nodes = []
 edges = []
 
 #Paste path to Nodes.txt here, make sure to use double slashes between folders
-with open('C:\\Users\\Christopher\\Desktop\\Geodesic Dome Calculator\\nodes.txt') as fp:
+#Nodes.txt.gz is read instead when only that is there
+with Open_Mesh_File('C:\\Users\\Christopher\\Desktop\\Geodesic Dome Calculator\\nodes.txt') as fp:
     line = fp.readline()
     count = 0
     while line:
-        xy = line.split(' ')
-        xy = (float(xy[0]), float(xy[1]), float(xy[2].rstrip('\n')))
+        xy = line.split()
+        xy = (float(xy[0]), float(xy[1]), float(xy[2]))
         #print(xy)
         nodes.append(xy)
         line = fp.readline()
 
 #Paste path to Edges.txt here, make sure to use double slashes between folders
-with open('C:\\Users\\Christopher\\Desktop\\Geodesic Dome Calculator\\Edges.txt') as fp:
+with Open_Mesh_File('C:\\Users\\Christopher\\Desktop\\Geodesic Dome Calculator\\Edges.txt') as fp:
     line = fp.readline()
     count = 0
     while line:
-        xy = line.split(' ')
-        xy = (int(xy[0]), int(xy[1].rstrip('\n')))
+        xy = line.split()
+        xy = (int(xy[0]), int(xy[1]))
         #print(xy)
         edges.append(xy)
         line = fp.readline()
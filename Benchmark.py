@@ -0,0 +1,354 @@
+#! /usr/bin/env python
+# -*- python -*-
+
+# ----------------------------------------------------------------
+# Complexity regression check for the generation pipeline
+#
+# Builds the dome at several frequencies, fits how the run time and the
+# peak memory of every stage grow with the vertex count V, and fails when
+# a stage grows faster than V log V or is slower than its stored budget.
+# This keeps nested scans from creeping back into the hot paths of
+# GeoSphere, IcoFace and DomeGenerator.
+#
+# The fast engine is also run with the sphere cut at a 3/8 base
+# (fast-truncated), so the truncate stage has a time budget as well.
+#
+# The start-up time of DomeGenerator (import, and --help which must not
+# load numpy) is tracked against the budget too.
+#
+# The budget is kept in multiples of a calibration run, a fixed mix of
+# interpreter and numpy work timed on the host before the checks, so it
+# holds on a faster or slower machine than the one that stored it.
+#
+#   python Benchmark.py             check against Benchmark_Budget.json
+#   python Benchmark.py --update    store the current timings as the budget
+#   python -m pytest                the same check through test_Benchmark.py
+#
+# The exit status is 1 when any check fails.
+# ----------------------------------------------------------------
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import Instrument as I
+
+
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Benchmark_Budget.json')
+
+# Frequencies tried for each engine
+FREQUENCIES = {'legacy': (4, 8, 12, 16), 'fast': (16, 32, 64, 128), 'fast-truncated': (16, 32, 64, 128)}
+
+# Allowed excess of the fitted exponent over that of V log V
+SLOPE_MARGIN = 0.25
+
+# Stages faster than this (seconds) or smaller than this (bytes) at the
+# largest frequency are too noisy to fit and only checked against the budget
+MIN_TIME = 0.002
+MIN_MEMORY = 64 * 1024
+
+# Timed runs of the calibration work, the best is kept
+CALIBRATION_REPEAT = 5
+
+
+# The files are written in turn, so the output and statistics stages are
+# each timed on their own rather than overlapping
+SEQUENTIAL = ['--write-threads', '0']
+
+
+def Run_Legacy(freq):
+    # Object based pipeline from DomeGenerator.py. Returns V.
+
+    import DomeGenerator as DG
+
+    nodes, edges, triangles = DG.main(['--frequency', str(freq), '--engine', 'legacy'] + SEQUENTIAL)[0]
+
+    return len(nodes)
+
+
+def Run_Fast(freq):
+    # Array pipeline from GeoMesh.py. Returns V.
+
+    import DomeGenerator as DG
+
+    nodes, edges, triangles = DG.main(['--frequency', str(freq), '--engine', 'fast'] + SEQUENTIAL)[0]
+
+    return len(nodes)
+
+
+def Run_Fast_Truncated(freq):
+    # The array pipeline with the sphere cut at a 3/8 base, for the
+    # truncate stage. Returns V.
+
+    import DomeGenerator as DG
+
+    nodes, edges, triangles = DG.main(['--frequency', str(freq), '--engine', 'fast', '--truncate', '3/8'] + SEQUENTIAL)[0]
+
+    return len(nodes)
+
+
+ENGINES = {'legacy': Run_Legacy, 'fast': Run_Fast, 'fast-truncated': Run_Fast_Truncated}
+
+# Commands timed for the start-up check, run in a fresh interpreter
+STARTUP = {
+    'import': ['-c', 'import DomeGenerator'],
+    'help': ['-m', 'DomeGenerator', '--help'],
+}
+
+
+def Run_Once(engine, freq, trace_memory=False):
+    # Run one build in a scratch directory with the output hidden.
+    # Returns V and the per stage times and peak memory.
+
+    I.Reset()
+
+    cwd = os.getcwd()
+    scratch = tempfile.mkdtemp()
+
+    if trace_memory:
+        tracemalloc.start()
+
+    try:
+        os.chdir(scratch)
+        with contextlib.redirect_stdout(io.StringIO()):
+            nV = ENGINES[engine](freq)
+    finally:
+        os.chdir(cwd)
+        if trace_memory:
+            tracemalloc.stop()
+        for name in os.listdir(scratch):
+            os.remove(os.path.join(scratch, name))
+        os.rmdir(scratch)
+
+    return nV, dict(I.Stage_Times), dict(I.Stage_Memory)
+
+
+def Measure(engine, frequencies, repeat):
+    # Best of `repeat` timings per stage, plus one traced run for memory
+
+    results = list()
+
+    for freq in frequencies:
+
+        times = None
+        for r in range(repeat):
+            nV, t, m = Run_Once(engine, freq)
+            if times is None:
+                times = t
+            else:
+                times = dict((s, min(times[s], t[s])) for s in times)
+
+        nV, t, memory = Run_Once(engine, freq, trace_memory=True)
+
+        results.append((freq, nV, times, memory))
+
+    return results
+
+
+def Calibrate(repeat=CALIBRATION_REPEAT):
+    # Best time of a fixed mix of dict and tuple work, as in the legacy
+    # engine, and a numpy sort, as in the fast one. Seconds.
+
+    values = np.random.default_rng(0).random(500000)
+
+    best = None
+    for r in range(repeat):
+        start = time.perf_counter()
+
+        table = dict()
+        for k in range(200000):
+            table[(k % 997, k % 991)] = k
+
+        np.argsort(values, kind='stable')
+
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def Measure_Startup(repeat):
+    # Best wall time of each start-up command, seconds
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    times = dict()
+
+    for name, cmd in STARTUP.items():
+        best = None
+        for r in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + cmd, cwd=here, stdout=subprocess.DEVNULL, check=True)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        times[name] = best
+
+    return times
+
+
+def Check_Startup(times, budget, margin, calibration):
+
+    failures = list()
+    stored = budget.get('startup', dict())
+
+    print ("\nStart-up")
+    print ("{:<12} {:>10} {:>10}   {}".format("Command", "Time (s)", "Budget", "Result"))
+
+    for name in sorted(times):
+        # The budget in seconds on this host
+        allowed = stored.get(name)
+        if allowed is not None:
+            allowed *= calibration
+        ok = allowed is None or times[name] <= allowed * margin
+        print ("{:<12} {:>10.4f} {:>10}   {}".format(
+            name, times[name], "-" if allowed is None else "{:.4f}".format(allowed), "ok" if ok else "over budget"))
+        if not ok:
+            failures.append("startup " + name + ": over budget")
+
+    return failures
+
+
+def Fit_Slope(xs, ys):
+    # Least squares slope of log(y) against log(x)
+
+    lx = [math.log(x) for x in xs]
+    ly = [math.log(max(y, 1e-12)) for y in ys]
+
+    mx = sum(lx) / len(lx)
+    my = sum(ly) / len(ly)
+
+    num = sum((a - mx) * (b - my) for a, b in zip(lx, ly))
+    den = sum((a - mx) ** 2 for a in lx)
+
+    return num / den
+
+
+def Load_Budget():
+
+    if not os.path.exists(BUDGET_FILE):
+        return dict()
+
+    with open(BUDGET_FILE) as fp:
+        return json.load(fp)
+
+
+def Save_Budget(budget):
+
+    with open(BUDGET_FILE, 'w') as fp:
+        json.dump(budget, fp, indent=4, sort_keys=True)
+        fp.write('\n')
+
+
+def Check(engine, results, budget, margin, calibration):
+    # Print the table for one engine and return the list of failures. The
+    # budget column is in seconds on this host.
+
+    failures = list()
+
+    Vs = [r[1] for r in results]
+    limit = Fit_Slope(Vs, [v * math.log(v) for v in Vs]) + SLOPE_MARGIN
+
+    freq, nV, last_times, last_memory = results[-1]
+
+    stored = budget.get(engine, dict())
+    if stored.get('frequency') != freq:
+        stored = dict()
+
+    print ("\nEngine: " + engine + "   V = " + ", ".join(str(v) for v in Vs) + "   limit V^" + "{:.2f}".format(limit))
+    print ("{:<12} {:>10} {:>7} {:>12} {:>7} {:>10}   {}".format("Stage", "Time (s)", "k", "Memory (kB)", "k", "Budget", "Result"))
+
+    for stage in I.Stage_Names:
+
+        times = [r[2][stage] for r in results]
+        memory = [r[3][stage] for r in results]
+
+        problems = list()
+
+        k_time = Fit_Slope(Vs, times)
+        if last_times[stage] >= MIN_TIME and k_time > limit:
+            problems.append("time grows as V^{:.2f}".format(k_time))
+
+        k_memory = Fit_Slope(Vs, memory)
+        if last_memory[stage] >= MIN_MEMORY and k_memory > limit:
+            problems.append("memory grows as V^{:.2f}".format(k_memory))
+
+        allowed = stored.get('relative', dict()).get(stage)
+        if allowed is not None:
+            allowed *= calibration
+        if allowed is not None and last_times[stage] > allowed * margin + MIN_TIME:
+            problems.append("over budget")
+
+        print ("{:<12} {:>10.4f} {:>7.2f} {:>12.1f} {:>7.2f} {:>10}   {}".format(
+            stage, last_times[stage], k_time, last_memory[stage] / 1024.0, k_memory,
+            "-" if allowed is None else "{:.4f}".format(allowed),
+            "; ".join(problems) if problems else "ok"))
+
+        for p in problems:
+            failures.append(engine + " " + stage + ": " + p)
+
+    return failures
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Check that every stage of the dome generation scales as O(V log V).")
+    parser.add_argument('--engine', choices=sorted(ENGINES), action='append', help="engine to check, default all")
+    parser.add_argument('--frequencies', type=int, nargs='+', help="frequencies to build, default depends on the engine")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per frequency, the best is kept")
+    parser.add_argument('--margin', type=float, default=None, help="allowed factor over the stored time budget")
+    parser.add_argument('--no-startup', action='store_true', help="skip the start-up time check")
+    parser.add_argument('--update', action='store_true', help="store the timings of this run as the new budget")
+    args = parser.parse_args(argv)
+
+    budget = Load_Budget()
+    margin = args.margin if args.margin is not None else budget.get('margin', 3.0)
+
+    failures = list()
+
+    calibration = Calibrate()
+    print ("Calibration: {:.4f} s on this host".format(calibration))
+
+    for engine in args.engine or sorted(ENGINES):
+
+        results = Measure(engine, sorted(args.frequencies or FREQUENCIES[engine]), args.repeat)
+        failures += Check(engine, results, budget, margin, calibration)
+
+        if args.update:
+            freq, nV, times, memory = results[-1]
+            budget[engine] = {'frequency': freq,
+                              'relative': dict((s, round(t / calibration, 4)) for s, t in times.items())}
+
+    if not args.no_startup:
+        startup = Measure_Startup(max(args.repeat, 5))
+        failures += Check_Startup(startup, budget, margin, calibration)
+
+        if args.update:
+            budget['startup'] = dict((s, round(t / calibration, 4)) for s, t in startup.items())
+
+    if args.update:
+        budget['margin'] = margin
+        budget['calibration'] = round(calibration, 4)
+        Save_Budget(budget)
+        print ("\nBudget saved to " + BUDGET_FILE)
+
+    if failures:
+        print ("\nFAILED")
+        for f in failures:
+            print ("  " + f)
+        return 1
+
+    print ("\nAll stages within O(V log V) and budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -134,6 +134,13 @@ class Coordinates(object):
         return NotImplemented
 
 
+    def Get_Key(self):
+
+        # Points are equal when their keys are equal, see __eq__. The
+        # dicts and sets that find equal points and edges use the key, as
+        # __hash__ hashes the exact values and two equal points can differ.
+        return ( round( self.x, 5 ), round( self.y, 5 ), round( self.z, 5 ) )
+
     def __hash__(self):
 
         return hash((self.x,self.y,self.z))
@@ -0,0 +1,150 @@
+#! /usr/bin/env python
+# -*- python -*-
+
+# ----------------------------------------------------------------
+# Check of the batched cs.cxform against the per-element loop it replaced
+#
+# The cxform library itself is not part of the repo, so Cxform_Stub.c, a
+# stand-in with the same date2es and cxform signatures, is built with the
+# C compiler into a scratch directory and loaded in its place. cs.cxform
+# and the old loop, one date2es and one cxform call per point, must then
+# give the same numbers for scalar, repeated, 2-d, sub-second and time
+# zone aware datetimes.
+#
+#   python Cxform_Check.py
+#   python Cxform_Check.py --cc clang
+#
+# The exit status is 1 when any case differs.
+# ----------------------------------------------------------------
+
+import argparse
+import ctypes
+import datetime
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+import cs
+
+
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Cxform_Stub.c')
+
+
+def Build_Stub(cc, directory):
+    # Compile the stub into a shared library, returns its path
+
+    path = os.path.join(directory, 'cxform-stub.so')
+    subprocess.run([cc, '-shared', '-fPIC', '-O2', '-o', path, STUB, '-lm'], check=True)
+    return path
+
+
+def Loop_Cxform(libcxform, cs_from, cs_to, dt, x, y, z):
+    # The per-element conversion cs.cxform made before it was batched, with
+    # the double restype of date2es and np.float64 for np.float_
+
+    dt = np.asarray(dt)
+    x_from = np.asarray(x)
+    y_from = np.asarray(y)
+    z_from = np.asarray(z)
+    if dt.ndim == 0:
+        dt = dt[None]
+        x_from = x_from[None]
+        y_from = y_from[None]
+        z_from = z_from[None]
+    x_to = np.empty(x_from.shape)
+    y_to = np.empty(y_from.shape)
+    z_to = np.empty(z_from.shape)
+    for i in range(dt.size):
+        es = libcxform.date2es(
+            ctypes.c_int(dt.flat[i].year),
+            ctypes.c_int(dt.flat[i].month),
+            ctypes.c_int(dt.flat[i].day),
+            ctypes.c_int(dt.flat[i].hour),
+            ctypes.c_int(dt.flat[i].minute),
+            ctypes.c_int(dt.flat[i].second)
+        )
+        v_in = np.array([x_from.flat[i], y_from.flat[i], z_from.flat[i]], dtype=np.float64)
+        v_out = np.empty(3, dtype=np.float64)
+        libcxform.cxform(
+            str.encode(cs_from),
+            str.encode(cs_to),
+            ctypes.c_double(es),
+            v_in.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
+            v_out.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+        )
+        x_to.flat[i] = v_out[0]
+        y_to.flat[i] = v_out[1]
+        z_to.flat[i] = v_out[2]
+    return (x_to.squeeze(), y_to.squeeze(), z_to.squeeze())
+
+
+def Cases():
+    # (name, dt, x, y, z)
+
+    rng = np.random.default_rng(0)
+    base = datetime.datetime(2019, 12, 31, 23, 59, 58)
+
+    def points(shape):
+        return rng.normal(size=shape), rng.normal(size=shape), rng.normal(size=shape)
+
+    repeated = np.array([base + datetime.timedelta(seconds=int(k) % 3) for k in range(50)], dtype=object)
+    yield ('scalar', base, 1.0, 2.0, 3.0)
+    yield ('repeated', repeated) + points(50)
+
+    grid = np.array([base - datetime.timedelta(days=400 * k, seconds=k) for k in range(12)], dtype=object)
+    yield ('2-d', grid.reshape(3, 4)) + points((3, 4))
+
+    fractions = np.array([base + datetime.timedelta(microseconds=250000 * k) for k in range(12)], dtype=object)
+    yield ('sub-second', fractions) + points(12)
+
+    zones = [datetime.timezone(datetime.timedelta(hours=h)) for h in (-7, 0, 5)]
+    aware = np.array([(base + datetime.timedelta(minutes=k)).replace(tzinfo=zones[k % 3]) for k in range(12)], dtype=object)
+    yield ('time zones', aware) + points(12)
+
+    old = np.array([datetime.datetime(1969, 12, 31, 23, 59, 59, 500000), datetime.datetime(1900, 3, 1)], dtype=object)
+    yield ('before 1970', old) + points(2)
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Compare cs.cxform with the per-element loop on a stub library.")
+    parser.add_argument('--cc', default=os.environ.get('CC', 'cc'), help="C compiler, default $CC or cc")
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.mkdtemp()
+    failures = 0
+
+    try:
+        libcxform = cs._load_libcxform(Build_Stub(args.cc, scratch))
+
+        print ("{:<12} {:>6} {:>14}   {}".format("case", "points", "systems", "result"))
+
+        for name, dt, x, y, z in Cases():
+            for cs_from, cs_to in (('GSE', 'GSM'), ('HEEQ', 'J2000')):
+                batched = cs.cxform(cs_from, cs_to, dt, x, y, z)
+                looped = Loop_Cxform(libcxform, cs_from, cs_to, dt, x, y, z)
+
+                ok = all(np.array_equal(b, l) and np.shape(b) == np.shape(l) for b, l in zip(batched, looped))
+                if not ok:
+                    failures += 1
+
+                print ("{:<12} {:>6} {:>14}   {}".format(name, np.size(dt), cs_from + " -> " + cs_to, "ok" if ok else "DIFFERS"))
+
+    finally:
+        cs._libcxform = None
+        shutil.rmtree(scratch)
+
+    if failures:
+        print ("FAILED: {} case(s) differ".format(failures))
+        return 1
+
+    print ("All cases match the per-element loop")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
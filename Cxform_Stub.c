@@ -0,0 +1,34 @@
+/* Stand-in for the cxform library, for Cxform_Check.py. It has the
+   date2es and cxform signatures of cxform-c but not its physics: the
+   ephemeris seconds are plain seconds from 2000-01-01 and the transform
+   is a rotation about z by an angle made from the time and the two
+   system names, so a wrong time, point or name gives a wrong answer. */
+
+#include <math.h>
+#include <string.h>
+
+static long days_from_civil(int y, int m, int d)
+{
+    y -= m <= 2;
+    long era = (y >= 0 ? y : y - 399) / 400;
+    long yoe = y - era * 400;
+    long doy = (153 * (m + (m > 2 ? -3 : 9)) + 2) / 5 + d - 1;
+    long doe = yoe * 365 + yoe / 4 - yoe / 100 + doy;
+    return era * 146097 + doe - 730425;
+}
+
+double date2es(int yyyy, int mm, int dd, int hh, int mm2, int ss)
+{
+    return days_from_civil(yyyy, mm, dd) * 86400.0 + hh * 3600.0 + mm2 * 60.0 + ss;
+}
+
+long cxform(const char *from, const char *to, const double et, double *v_in, double *v_out)
+{
+    double angle = fmod(et, 86400.0) * 1e-4 + strlen(from) - 2.0 * strlen(to) + from[0] - to[0];
+
+    v_out[0] = cos(angle) * v_in[0] - sin(angle) * v_in[1];
+    v_out[1] = sin(angle) * v_in[0] + cos(angle) * v_in[1];
+    v_out[2] = v_in[2] + et * 1e-9;
+
+    return 0;
+}
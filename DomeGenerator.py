@@ -15,374 +15,784 @@ import Coordinates as C
 import IcoFace as F
 import GeoSphere as G
 import config as CF
-import statistics
-try:
-    import pip
-except ImportError:
-    raise Exception("Pip is not installed on you computer. Please see instruction 3 on the readme.")
-import subprocess
+import Instrument as I
+import Pipeline as P
+import argparse
+import fractions
+import importlib
+import os
+import shlex
 import sys
 
-try:
-    import cs
-except ImportError:
-    subprocess.check_call([sys.executable, "-m", "pip", "install", 'cs'])
-    import cs
+# numpy and the modules built on it are only imported by the stages that
+# use them, so --help and argument errors do not pay for them. Nothing is
+# ever installed from here, a missing package is reported instead.
+
+def Require(name):
+    # Import a module needed by a stage
+
+    try:
+        return importlib.import_module(name)
+    except ImportError as err:
+        missing = err.name or name
+        raise ImportError("DomeGenerator needs the '" + missing + "' package, which is not installed. "
+                          "Install it with 'pip install " + missing + "', see instruction 3 in Readme.txt.", name=missing)
+
+
+# Peak memory of the legacy engine per node, measured. The GeoSphere
+# objects hold Decimal coordinates, so it is far above that of GeoMesh.
+LEGACY_BYTES_PER_NODE = 10 * 1024
+
+
+def Build_GeoSphere():
+    # Create the icosahedron and add its 20 faces to a new GeoSphere
+
+    dPi = D.Decimal(str(math.pi))
+
+    # Centre angle of pentagon
+    t1_rad = D.Decimal(2 * dPi / 5)
+    t2_rad = D.Decimal(dPi / 10)
+    t3_rad = D.Decimal(-3 * dPi / 10)
+    t4_rad = D.Decimal(dPi / 5)
+
+    S_mm_t = 2 * CF.R_mm * math.sin(t4_rad)  # Side Length
+    S_mm = D.Decimal(str(S_mm_t))
+
+    H_mm_t = math.cos(t4_rad) * CF.R_mm  # Height of triangle
+    H_mm = D.Decimal(str(H_mm_t))
+
+    Cx_mm_t = CF.R_mm * math.cos(t2_rad)
+    Cx_mm = D.Decimal(str(Cx_mm_t))
+
+    Cy_mm_t = CF.R_mm * math.sin(t2_rad)
+    Cy_mm = D.Decimal(str(Cy_mm_t))
+
+    # The radius may be a float given on the command line
+    R_mm = D.Decimal(str(CF.R_mm))
+
+    H1_mm = D.Decimal(str(math.sqrt(S_mm * S_mm - R_mm * R_mm)))
+    H2_mm = D.Decimal(str(math.sqrt((H_mm + R_mm) * (H_mm + R_mm) - (H_mm * H_mm))))
+
+    Z2_mm = D.Decimal((H2_mm - H1_mm) / 2)  # Coordinate of points (b-f)
+    Z1_mm = D.Decimal(Z2_mm + H1_mm)  # Coordinate of point (a)
+
+    # -------------------------------------------
+    # Icosahedron Coordinate Equations
+    #   http://www.vb-helper.com/tutorial_platonic_solids.html
+    #
+    # a = (   0,   0,  Z1)
+    # b = (   0,   R,  Z2)
+    # c = (  Cx,  Cy,  Z2)
+    # d = ( S/2,  -H,  Z2)
+    # e = (-S/2,  -H,  Z2)
+    # f = ( -Cx,  Cy,  Z2)
+    # g = (   0,  -R, -Z2)
+    # h = ( -Cx, -Cy, -Z2)
+    # i = (-S/2,   H, -Z2)
+    # j = ( S/2,   H, -Z2)
+    # k = (  Cx, -Cy, -Z2)
+    # l = (   0,   0, -Z1)
+
+    gs = G.GeoSphere("Sphere", CF.frequency_n, CF.R_mm)
+
+    with I.Stage("icosahedron"):
+
+        # Icosahedron vertice coordinates
+        a = C.Coordinates("a")
+        a.Set_Cartesian(0, 0, D.Decimal(Z1_mm))
+        a.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(a)
+
+        b = C.Coordinates("b")
+        b.Set_Cartesian(0, CF.R_mm, Z2_mm)
+        b.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(b)
+
+        c = C.Coordinates("c")
+        c.Set_Cartesian(Cx_mm, Cy_mm, Z2_mm)
+        c.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(c)
+
+        d = C.Coordinates("d")
+        d.Set_Cartesian(S_mm / 2, -H_mm, Z2_mm)
+        d.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(d)
+
+        e = C.Coordinates("e")
+        e.Set_Cartesian(-S_mm / 2, -H_mm, Z2_mm)
+        e.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(e)
+
+        f = C.Coordinates("f")
+        f.Set_Cartesian(-Cx_mm, Cy_mm, Z2_mm)
+        f.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(f)
+
+        g = C.Coordinates("g")
+        g.Set_Cartesian(0, -CF.R_mm, -Z2_mm)
+        g.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(g)
+
+        h = C.Coordinates("h")
+        h.Set_Cartesian(-Cx_mm, -Cy_mm, -Z2_mm)
+        h.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(h)
+
+        i = C.Coordinates("i")
+        i.Set_Cartesian(-S_mm / 2, H_mm, -Z2_mm)
+        i.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(i)
+
+        j = C.Coordinates("j")
+        j.Set_Cartesian(S_mm / 2, H_mm, -Z2_mm)
+        j.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(j)
+
+        k = C.Coordinates("k")
+        k.Set_Cartesian(Cx_mm, -Cy_mm, -Z2_mm)
+        k.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(k)
+
+        l = C.Coordinates("l")
+        l.Set_Cartesian(0, 0, -Z1_mm)
+        l.Set_Point_Number(CF.nPoint)
+        CF.nPoint += 1
+        gs.Add_Vertex(l)
+
+    # ---------------------------------------------
+    # Add the 20 icosahedron faces to the object
+    #
+
+    with I.Stage("faces"):
+
+        # Top 5 faces
+
+        gs.Add_Face(a, b, c)
+        gs.Add_Face(a, c, d)
+        gs.Add_Face(a, d, e)
+        gs.Add_Face(a, e, f)
+        gs.Add_Face(a, f, b)
+
+        # Middle faces
+
+        gs.Add_Face(j, k, c)
+        gs.Add_Face(k, d, g)
+        gs.Add_Face(g, e, h)
+        gs.Add_Face(h, f, i)
+        gs.Add_Face(i, b, j)
+
+        gs.Add_Face(c, k, d)
+        gs.Add_Face(d, g, e)
+        gs.Add_Face(e, h, f)
+        gs.Add_Face(f, i, b)
+        gs.Add_Face(b, j, c)
+
+        # Bottom faces
+        gs.Add_Face(l, k, j)
+        gs.Add_Face(l, j, i)
+        gs.Add_Face(l, i, h)
+        gs.Add_Face(l, h, g)
+        gs.Add_Face(l, g, k)
+
+    return gs
+
+
+def Calculate_Edges(gs):
+    # ---------------------------------
+    # Calculations
+
+    # Once all faces added, derive list of unique points
+    with I.Stage("points"):
+        gs.Point_List_From_Edges()
+
+    # Create the list of edges with the new numbered and unique points
+    with I.Stage("edges"):
+        gs.Create_New_Edges()
+
+    # Remove duplicate edges as faces joining up will have the same edge
+    with I.Stage("dedupe"):
+        gs.Remove_Duplicate_Edges()
+
+    # Set all the points to have the same radius
+    # gs.Set_Edges_Pt_Radius( CF.R_mm )
+
+    # For each point find the edges which meet there
+    with I.Stage("hubs"):
+        gs.Hub_List_From_Edges()
+
+
+def Get_Unsorted_Points(gs):
+    # Flat (icosahedral) coordinates of every point, in point number order
+
+    unsorted_points = []
+    for p in (gs.Point_Hash.keys()):
+        points_string = p.Get_Cartesian_Coordinates()
+        points_tuple = points_string[points_string.find('(') + 1 : points_string.find(')')]
+        points_tuple = points_tuple.split(',')
+        new_tuple = []
+        for i in points_tuple:
+            if 'E' in i:
+                new_tuple.append(float("{:.8f}".format(float(i))))
+            else:
+                new_tuple.append(float(i))
+        new_tuple = tuple(new_tuple)
+        unsorted_points.append(new_tuple)
+
+    return unsorted_points
+
+
+def Project_Points(unsorted_points):
+    # Push the points out onto the sphere and/or cylinder
+
+    cs = Require('cs')
 
-try:
-    import numpy as np
-except ImportError:
-    subprocess.check_call([sys.executable, "-m", "pip", "install", 'numpy'])
-    import numpy as np
+    sorted_points = []
+    quadrant = 0
+    cylindrical_radius = ((CF.R_mm ** 2) - ((CF.R_mm *CF.Cut_Point) ** 2)) **.5
+    if not CF.Cylindrical and not CF.Icosohedral:
+        for i in unsorted_points:
+            x = i[0]
+            y = i[1]
+            z = i[2]
 
-dPi = D.Decimal(str(math.pi))
+            r, theta, phi = cs.cart2sp(x = x, y = y, z = z)
+            r = CF.R_mm
 
-# Centre angle of pentagon
-t1_rad = D.Decimal(2 * dPi / 5)
-t2_rad = D.Decimal(dPi / 10)
-t3_rad = D.Decimal(-3 * dPi / 10)
-t4_rad = D.Decimal(dPi / 5)
+            x, y, z = cs.sp2cart(r = r, theta = theta, phi = phi)
+            point = ((float(x), float(y), float(z)))
+            sorted_points.append(point)
+    elif CF.Cylindrical and CF.Icosohedral:
+        for i in unsorted_points:
+            x = i[0]
+            y = i[1]
+            z = i[2]
 
-S_mm_t = 2 * CF.R_mm * math.sin(t4_rad)  # Side Length
-S_mm = D.Decimal(str(S_mm_t))
+            r, phi, z = cs.cart2cyl(x=x, y=y, z=z)
 
-H_mm_t = math.cos(t4_rad) * CF.R_mm  # Height of triangle
-H_mm = D.Decimal(str(H_mm_t))
+            if z < (CF.R_mm * CF.Cut_Point):
+                r = cylindrical_radius
 
-Cx_mm_t = CF.R_mm * math.cos(t2_rad)
-Cx_mm = D.Decimal(str(Cx_mm_t))
+            x, y, z = cs.cyl2cart(r = r, phi = phi, z = z)
+            point = ((float(x), float(y), float(z)))
+            sorted_points.append(point)
 
-Cy_mm_t = CF.R_mm * math.sin(t2_rad)
-Cy_mm = D.Decimal(str(Cy_mm_t))
+    elif CF.Cylindrical and not CF.Icosohedral:
+        for i in unsorted_points:
 
-H1_mm = D.Decimal(str(math.sqrt(S_mm * S_mm - CF.R_mm * CF.R_mm)))
-H2_mm = D.Decimal(str(math.sqrt((H_mm + CF.R_mm) * (H_mm + CF.R_mm) - (H_mm * H_mm))))
+            x = i[0]
+            y = i[1]
+            z = i[2]
 
-Z2_mm = D.Decimal((H2_mm - H1_mm) / 2)  # Coordinate of points (b-f)
-Z1_mm = D.Decimal(Z2_mm + H1_mm)  # Coordinate of point (a)
+            if z < (CF.R_mm * CF.Cut_Point):
+                r, phi, z = cs.cart2cyl(x=x, y=y, z=z)
+                r = cylindrical_radius
+                x, y, z = cs.cyl2cart(r=r, phi=phi, z=z)
 
-# -------------------------------------------
-# Icosahedron Coordinate Equations
-#   http://www.vb-helper.com/tutorial_platonic_solids.html
-#
-# a = (   0,   0,  Z1)
-# b = (   0,   R,  Z2)
-# c = (  Cx,  Cy,  Z2)
-# d = ( S/2,  -H,  Z2)
-# e = (-S/2,  -H,  Z2)
-# f = ( -Cx,  Cy,  Z2)
-# g = (   0,  -R, -Z2)
-# h = ( -Cx, -Cy, -Z2)
-# i = (-S/2,   H, -Z2)
-# j = ( S/2,   H, -Z2)
-# k = (  Cx, -Cy, -Z2)
-# l = (   0,   0, -Z1)
-
-gs = G.GeoSphere("Sphere", CF.frequency_n, CF.R_mm);
-
-# Test coordinates
-# t1 = C.Coordinates("t1")
-# t1.Set_Cartesian( -500, -500, 500 )
-# t1.Set_Point_Number( CF.nPoint )
-# CF.nPoint += 1
-# gs.Add_Vertex(t1)
-
-# t2 = C.Coordinates("t2")
-# t2.Set_Cartesian( 500, -500, 500 )
-# t2.Set_Point_Number( CF.nPoint )
-# CF.nPoint += 1
-# gs.Add_Vertex(t2)
-
-# t3 = C.Coordinates("t3")
-# t3.Set_Cartesian( 0, 500, 500 )
-# t3.Set_Point_Number( CF.nPoint )
-# CF.nPoint += 1
-# gs.Add_Vertex(t3)
-
-
-# Icosahedron vertice coordinates
-a = C.Coordinates("a")
-a.Set_Cartesian(0, 0, D.Decimal(Z1_mm))
-a.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(a)
-
-b = C.Coordinates("b")
-b.Set_Cartesian(0, CF.R_mm, Z2_mm)
-b.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(b)
-
-c = C.Coordinates("c")
-c.Set_Cartesian(Cx_mm, Cy_mm, Z2_mm)
-c.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(c)
-
-d = C.Coordinates("d")
-d.Set_Cartesian(S_mm / 2, -H_mm, Z2_mm)
-d.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(d)
-
-e = C.Coordinates("e")
-e.Set_Cartesian(-S_mm / 2, -H_mm, Z2_mm)
-e.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(e)
-
-f = C.Coordinates("f")
-f.Set_Cartesian(-Cx_mm, Cy_mm, Z2_mm)
-f.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(f)
-
-g = C.Coordinates("g")
-g.Set_Cartesian(0, -CF.R_mm, -Z2_mm)
-g.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(g)
-
-h = C.Coordinates("h")
-h.Set_Cartesian(-Cx_mm, -Cy_mm, -Z2_mm)
-h.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(h)
-
-i = C.Coordinates("i")
-i.Set_Cartesian(-S_mm / 2, H_mm, -Z2_mm)
-i.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(i)
-
-j = C.Coordinates("j")
-j.Set_Cartesian(S_mm / 2, H_mm, -Z2_mm)
-j.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(j)
-
-k = C.Coordinates("k")
-k.Set_Cartesian(Cx_mm, -Cy_mm, -Z2_mm)
-k.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(k)
-
-l = C.Coordinates("l")
-l.Set_Cartesian(0, 0, -Z1_mm)
-l.Set_Point_Number(CF.nPoint)
-CF.nPoint += 1
-gs.Add_Vertex(l)
-
-# ---------------------------------------------
-# Add the 20 icosahedron faces to the object
-#
+            else:
+                r, theta, phi = cs.cart2sp(x=x, y=y, z=z)
+                r = CF.R_mm
+                x, y, z = cs.sp2cart(r=r, theta=theta, phi=phi)
 
+            point = ((float(x), float(y), float(z)))
+            sorted_points.append(point)
 
-# Test Face Only
-# gs.Add_Face( t1, t2, t3 )
-# gs.Print_Vertices()
+    else:
+        # Icosohedral only: keep the points on the flat faces
+        sorted_points = list(unsorted_points)
 
-# Top 5 faces
+    return sorted_points
 
-gs.Add_Face(a, b, c)
-gs.Add_Face(a, c, d)
-gs.Add_Face(a, d, e)
-gs.Add_Face(a, e, f)
-gs.Add_Face(a, f, b)
 
-# Middle faces
+def Get_Edge_Numbers(gs):
 
-gs.Add_Face(j, k, c)
-gs.Add_Face(k, d, g)
-gs.Add_Face(g, e, h)
-gs.Add_Face(h, f, i)
-gs.Add_Face(i, b, j)
+    edge_number_list = []
 
-gs.Add_Face(c, k, d)
-gs.Add_Face(d, g, e)
-gs.Add_Face(e, h, f)
-gs.Add_Face(f, i, b)
-gs.Add_Face(b, j, c)
 
-# Bottom faces
-gs.Add_Face(l, k, j)
-gs.Add_Face(l, j, i)
-gs.Add_Face(l, i, h)
-gs.Add_Face(l, h, g)
-gs.Add_Face(l, g, k)
+    for e in gs.Edge_List:
+        #print(type(e))
+        edge_number_list.append(e.Get_Edge_Number())
 
-# ---------------------------------
-# Calculations
+    # Points closer than Abaqus can draw a line between are merged before
+    # the files are written, see Merge.py and --merge-tolerance
 
+    return edge_number_list
 
-# Once all faces added, derive list of unique points
-gs.Point_List_From_Edges()
 
-# Create the list of edges with the new numbered and unique points
-gs.Create_New_Edges()
+def Find_Triangles(gs):
+    # The small triangles of every face subdivision as point numbers, wound
+    # anticlockwise seen from outside (IcoFace.Get_Edges_Equal_Distance).
+    # For domes only the triangles with all three points up are kept.
 
-# Remove duplicate edges as faces joining up will have the same edge
-gs.Remove_Duplicate_Edges()
+    triangle_list = []
 
-# Set all the points to have the same radius
-# gs.Set_Edges_Pt_Radius( CF.R_mm )
+    # Point_Hash can hold two copies of a point that differ only in the
+    # digits Coordinates.__eq__ ignores. A corner missing from it gets the
+    # first copy with its key, as the edges dedupe by key.
+    by_key = dict()
+    for p in gs.Point_Hash:
+        by_key.setdefault(p.Get_Key(), p.point_number)
 
-# For each point find the edges which meet there
-gs.Hub_List_From_Edges()
+    for face in gs.FaceList:
+        for t in face.Triangles:
 
-# ---------------------------------
-# Print Results
+            if CF.Dome_calc and min(p.z for p in t) < -CF.TINY:
+                continue
 
-#print(type(gs.Point_Hash))
-# for p in (gs.Point_Hash.keys()):
-#     print(p.Get_Cartesian_Coordinates())
+            numbers = list()
+            for p in t:
+                point = gs.Get_Point(p)
+                numbers.append(point.point_number if point is not None else by_key.get(p.Get_Key()))
 
-unsorted_points = []
-for p in (gs.Point_Hash.keys()):
-    points_string = p.Get_Cartesian_Coordinates()
-    points_tuple = points_string[points_string.find('(') + 1 : points_string.find(')')]
-    points_tuple = points_tuple.split(',')
-    new_tuple = []
-    for i in points_tuple:
-        if 'E' in i:
-            new_tuple.append(float("{:.8f}".format(float(i))))
-        else:
-            new_tuple.append(float(i))
-    new_tuple = tuple(new_tuple)
-    unsorted_points.append(new_tuple)
+            if None not in numbers:
+                triangle_list.append(numbers)
 
+    return triangle_list
 
 
+def Print_Statistics(nodes, edges):
+    # nodes is the (V, 3) coordinate array, edges the (E, 2) array of 0
+    # based node numbers
 
-sorted_points = []
-quadrant = 0
-cylindrical_radius = ((CF.R_mm ** 2) - ((CF.R_mm *CF.Cut_Point) ** 2)) **.5
-if not CF.Cylindrical and not CF.Icosohedral:
-    for i in unsorted_points:
-        x = i[0]
-        y = i[1]
-        z = i[2]
+    np = Require('numpy')
 
-        r, theta, phi = cs.cart2sp(x = x, y = y, z = z)
-        r = CF.R_mm
+    # Sums in float64 also for float32 nodes
+    bar_length_list = np.sqrt(((nodes[edges[:, 0]] - nodes[edges[:, 1]]) ** 2).sum(axis=1))
+    total_beam = float(bar_length_list.sum(dtype=np.float64))
 
-        x, y, z = cs.sp2cart(r = r, theta = theta, phi = phi)
-        point = ((float(x), float(y), float(z)))
-        sorted_points.append(point)
-elif CF.Cylindrical and CF.Icosohedral:
-    for i in unsorted_points:
-        x = i[0]
-        y = i[1]
-        z = i[2]
+    std_dev = float(bar_length_list.std(dtype=np.float64))
 
-        r, phi, z = cs.cart2cyl(x=x, y=y, z=z)
+    print("Total bar length: " + str(total_beam) + " meters")
+    print("Member Count: " + str(len(edges) + 1))
+    print("Average Member Length: " + str(total_beam / (len(edges) + 1)))
+    print("Bar Length Standard Deviation: " + str(std_dev))
+    print("Percent Deviation: " + str(round(100 * std_dev / (total_beam / (len(edges) + 1)), 2)), '%')
 
-        if z < (CF.R_mm * CF.Cut_Point):
-            r = cylindrical_radius
 
-        x, y, z = cs.cyl2cart(r = r, phi = phi, z = z)
-        point = ((float(x), float(y), float(z)))
-        sorted_points.append(point)
+def Generate_Flat():
+    # Build the dome from the config.py parameters up to the points on the
+    # flat icosahedron faces, which do not depend on the projection
 
-elif CF.Cylindrical and not CF.Icosohedral:
-    for i in unsorted_points:
+    gs = Build_GeoSphere()
 
-        x = i[0]
-        y = i[1]
-        z = i[2]
+    Calculate_Edges(gs)
 
-        if z < (CF.R_mm * CF.Cut_Point):
-            r, phi, z = cs.cart2cyl(x=x, y=y, z=z)
-            r = cylindrical_radius
-            x, y, z = cs.cyl2cart(r=r, phi=phi, z=z)
+    with I.Stage("flat points"):
+        unsorted_points = Get_Unsorted_Points(gs)
 
-        else:
-            r, theta, phi = cs.cart2sp(x=x, y=y, z=z)
-            r = CF.R_mm
-            x, y, z = cs.sp2cart(r=r, theta=theta, phi=phi)
+    edge_number_list = Get_Edge_Numbers(gs)
+
+    with I.Stage("triangles"):
+        triangles = Find_Triangles(gs)
+
+    return gs, unsorted_points, edge_number_list, triangles
+
+
+def Generate():
+    # Build the dome from the config.py parameters, without writing anything
+
+    gs, unsorted_points, edge_number_list, triangles = Generate_Flat()
+
+    with I.Stage("projection"):
+        sorted_points = Project_Points(unsorted_points)
+
+    return gs, sorted_points, edge_number_list, triangles
+
+
+def Plan_Dome(args, stream=False):
+    # Expected sizes of the dome and the memory and disk space its run
+    # takes, from GeoMesh.Plan and Writers.Footprint. The run needs the
+    # largest of the build and the finished arrays plus the writers.
+
+    GM = Require('GeoMesh')
+    W = Require('Writers')
+
+    plan = GM.Plan(args.frequency, args.dome, args.precision)
+
+    if args.engine == 'legacy':
+        plan['peak_bytes'] = max(plan['peak_bytes'], plan['nodes'] * LEGACY_BYTES_PER_NODE)
+
+    disk, writing = W.Footprint(args.formats or ['txt'], plan['nodes'], plan['edges'], plan['triangles'],
+                                plan['node_dtype'], plan['index_dtype'], stream, args.write_threads, args.compress)
+
+    plan['stream'] = stream
+    plan['disk_bytes'] = disk
+    plan['memory_bytes'] = max(plan['peak_bytes'], plan['mesh_bytes'] + writing)
+
+    return plan
+
+
+def Format_Bytes(n):
+
+    units = ('B', 'kB', 'MB', 'GB', 'TB')
+
+    k = 0
+    while n >= 1024 and k < len(units) - 1:
+        n /= 1024.0
+        k += 1
+
+    return "{:.1f} {}".format(n, units[k])
+
+
+def Print_Plan(plan):
+
+    bound = "" if plan['exact'] else "at most "
+
+    print("Frequency " + str(plan['frequency']) + " plan")
+    print("  Nodes: " + bound + str(plan['nodes']))
+    print("  Edges: " + bound + str(plan['edges']))
+    print("  Triangles: " + bound + str(plan['triangles']))
+    print("  Dtypes: " + str(plan['node_dtype']) + " nodes, " + str(plan['index_dtype']) + " node numbers")
+    print("  Memory: " + Format_Bytes(plan['memory_bytes']) + (" (text written in chunks)" if plan['stream'] else ""))
+    print("  Disk: " + Format_Bytes(plan['disk_bytes']))
+
+
+def Check_Memory(args):
+    # Plan the run against the memory budget. Returns whether the text
+    # files must be streamed, raises MemoryError when even that is over.
+
+    budget = args.memory_budget * 1024 * 1024
+
+    plan = Plan_Dome(args, args.stream)
+    if not budget or plan['memory_bytes'] <= budget:
+        return args.stream
+
+    streamed = Plan_Dome(args, True)
+    if streamed['memory_bytes'] <= budget:
+        print("Planned memory " + Format_Bytes(plan['memory_bytes']) + " is over the budget of "
+              + Format_Bytes(budget) + ", writing the text files in chunks")
+        return True
+
+    raise MemoryError("Frequency " + str(args.frequency) + " needs about " + Format_Bytes(streamed['memory_bytes'])
+                      + ", over the memory budget of " + Format_Bytes(budget)
+                      + ". Use a smaller frequency, the fast engine, --precision compact or a larger --memory-budget.")
+
+
+def Build_Parser():
+    # Command line options, defaulting to the values in config.py
+
+    parser = argparse.ArgumentParser(
+        prog='python -m DomeGenerator',
+        description="Generate geodesic dome nodes, edges and triangles for Abaqus.")
+
+    parser.add_argument('--radius', type=float, default=CF.R_mm, help="radius, in the units of the rest of the simulation")
+    parser.add_argument('--frequency', type=int, default=CF.frequency_n, help="frequency of the geodesic")
+    parser.add_argument('--dome', action=argparse.BooleanOptionalAction, default=CF.Dome_calc, help="dome (--dome) or full sphere (--no-dome)")
+    parser.add_argument('--icosohedral', action=argparse.BooleanOptionalAction, default=CF.Icosohedral, help="keep the nodes on the flat icosahedron faces")
+    parser.add_argument('--cylindrical', action=argparse.BooleanOptionalAction, default=CF.Cylindrical, help="put the nodes below the cut point on a cylinder")
+    parser.add_argument('--cut-point', type=float, default=CF.Cut_Point, help="0 < x < 1, height of the cylindrical cut as a fraction of the radius")
+
+    parser.add_argument('--engine', choices=('legacy', 'fast'), default=CF.Engine, help="GeoSphere objects (legacy) or GeoMesh arrays (fast)")
+    parser.add_argument('--symmetric', action=argparse.BooleanOptionalAction, default=CF.Symmetric, help="fast engine: divide one face and rotate it into the other 19")
+    parser.add_argument('--precision', choices=('double', 'compact'), default=CF.Precision, help="float64 nodes for Abaqus (double) or float32 nodes and small node numbers for previews (compact)")
+    parser.add_argument('--renumber', choices=('none', 'rcm', 'morton', 'hilbert'), default=CF.Renumber, help="renumber the nodes before writing, rcm (Reverse Cuthill-McKee) for a small bandwidth, morton or hilbert to order nodes and elements in space")
+    parser.add_argument('--merge-tolerance', type=float, default=CF.Merge_Tolerance, help="merge nodes closer than this before writing, 0 to keep them all")
+    parser.add_argument('--validate', action=argparse.BooleanOptionalAction, default=CF.Validate, help="check the mesh before writing and stop if it is not a valid sphere or dome")
+    truncation = parser.add_mutually_exclusive_group()
+    truncation.add_argument('--truncate', type=fractions.Fraction, default=CF.Truncate, help="cut the sphere at a level base leaving this fraction of its diameter, e.g. 3/8 or 5/8, instead of --dome")
+    truncation.add_argument('--truncate-plane', type=float, nargs=4, metavar=('NX', 'NY', 'NZ', 'OFFSET'), help="cut the sphere at the plane NX x + NY y + NZ z = OFFSET, keeping the side the normal points to")
+    parser.add_argument('--levels', type=int, default=1, help="also make the dome at 2, 4 ... times the frequency, this many in all, refined from each other by the fast engine")
+    parser.add_argument('--out', default='.', help="output directory, may use {frequency}, {radius} etc. of the dome")
+    parser.add_argument('--format', dest='formats', action='append', help="output format, txt, npy or inp (Abaqus nodes and S3 shell elements), may be given more than once, default txt")
+    parser.add_argument('--cache', default=CF.Cache_Dir, help="directory to keep the projected mesh in, so later runs changing only the radius or the cut skip the build")
+    parser.add_argument('--batch', help="file with the options of one dome per line, added to the command line ones")
+    parser.add_argument('--plan', action='store_true', help="only print the expected counts, memory and disk space of each dome")
+    parser.add_argument('--memory-budget', type=float, default=CF.Memory_Budget_MB, help="MB a run may use, above it the text is streamed or the dome refused, 0 for no limit")
+    parser.add_argument('--stream', action='store_true', help="always write the text files in chunks")
+    parser.add_argument('--compress', type=int, choices=range(10), default=CF.Compress_Level, metavar='LEVEL', help="write every file through gzip at this level, 1 (fastest) to 9 (smallest), as Nodes.txt.gz etc., 0 for none")
+    parser.add_argument('--write-threads', type=int, default=CF.Write_Threads, help="output files written at once, overlapping the statistics, 0 to write them in turn")
+
+    parser.add_argument('--timings', action='store_true', help="print the time taken by each stage")
+    parser.add_argument('--count-ops', action='store_true', default=CF.Count_Operations, help="also count calls to the hot methods of each stage")
+    parser.add_argument('--cprofile', help="write cProfile statistics of the whole run to this file")
+
+    return parser
+
+
+def Read_Batch(parser, args):
+    # One set of options per line of the batch file, blank lines and lines
+    # starting with # are skipped
+
+    runs = list()
+
+    with open(args.batch) as fp:
+        for line in fp:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            run = parser.parse_args(shlex.split(line), namespace=argparse.Namespace(**vars(args)))
+            run.batch = None
+            runs.append(run)
+
+    return runs
+
+
+def Legacy_Flat_Arrays(np, GM, precision):
+    # Build the dome with the GeoSphere pipeline from the config parameters
+    # and return its flat float64 points, edge and triangle arrays, for
+    # GeoMesh.Project_Points
+
+    gs, unsorted_points, edge_number_list, triangles = Generate_Flat()
+
+    nodes = np.array(unsorted_points, dtype=np.float64).reshape(-1, 3)
+    index_dtype = GM.Index_Dtype(len(nodes), precision)
+
+    edges = (np.array(edge_number_list, dtype=np.int64).reshape(-1, 2) - 1).astype(index_dtype, copy=False)
+    triangles = (np.array(triangles, dtype=np.int64).reshape(-1, 3) - 1).astype(index_dtype, copy=False)
+
+    return nodes, edges, triangles
+
+
+def Write_Pool(threads):
+    # Thread pool the output files are written on, None when threads is 0.
+    # concurrent.futures loads logging and threading, so it is only
+    # imported here, not for --help.
+
+    if threads > 0:
+        futures = Require('concurrent.futures')
+        return futures.ThreadPoolExecutor(threads)
+
+    contextlib = Require('contextlib')
+    return contextlib.nullcontext()
+
+
+def Run_Dome(args, cache=None):
+    # Build, write and report one dome, or with --levels the dome at
+    # frequency, 2 x frequency ... Returns the node, edge and triangle
+    # arrays written for every level, with 0 based node numbers. Stages
+    # made from the same inputs by an earlier run with the same cache are
+    # reused, see Pipeline.py.
+
+    # The GeoSphere pipeline reads its parameters from config
+    CF.R_mm = args.radius
+    CF.frequency_n = args.frequency
+    CF.Dome_calc = args.dome
+    CF.Icosohedral = args.icosohedral
+    CF.Cylindrical = args.cylindrical
+    CF.Cut_Point = args.cut_point
+
+    np = Require('numpy')
+    GM = Require('GeoMesh')
+    W = Require('Writers')
+    R = Require('Renumber')
+    MG = Require('Merge')
+    T = Require('Truncate')
+    V = Require('Validate')
+
+    if cache is None:
+        cache = P.Cache()
+    cache.Begin()
+
+    frequencies = [args.frequency * 2 ** k for k in range(args.levels)]
+
+    if args.truncate is not None:
+        plane = T.Height_Plane(args.truncate, args.radius)
+    elif args.truncate_plane is not None:
+        plane = (args.truncate_plane[:3], args.truncate_plane[3])
+    else:
+        plane = None
+
+    # The finest level decides the memory
+    stream = Check_Memory(argparse.Namespace(**dict(vars(args), frequency=frequencies[-1])))
+
+    I.Reset()
+
+    build_inputs = (args.engine, args.frequency, args.levels, args.dome, args.precision, args.symmetric)
+    projection_inputs = build_inputs + (args.icosohedral, args.cylindrical, args.cut_point)
+    scale_inputs = projection_inputs + (args.radius,)
+    merge_inputs = scale_inputs + (args.merge_tolerance,)
+    truncate_inputs = merge_inputs + (None if plane is None else (tuple(float(x) for x in plane[0]), float(plane[1])),)
+
+    def build():
+        # Every level after the first refined from the one before
+        return GM.Build_Ladder(args.frequency, args.levels, args.radius, args.dome, args.icosohedral, args.cylindrical,
+                               args.cut_point, args.precision, args.symmetric)
+
+    def build_legacy():
+        # The flat points of every level, each built from scratch at the
+        # radius
+        levels = list()
+        for freq in frequencies:
+            CF.frequency_n = freq
+            levels.append(Legacy_Flat_Arrays(np, GM, args.precision))
+        return args.radius, levels
+
+    def project():
+        # The levels at the radius they were built with
+
+        if args.engine == 'legacy':
+            built_radius, flat_levels = cache.Stage("build", build_inputs, build_legacy)
+            node_dtype = GM.Node_Dtype(args.precision)
+            with I.Stage("projection"):
+                return built_radius, [(GM.Project_Points(flat, built_radius, args.icosohedral, args.cylindrical,
+                                                         args.cut_point).astype(node_dtype, copy=False), edges, triangles)
+                                      for flat, edges, triangles in flat_levels]
+
+        meshes = cache.Stage("build", build_inputs, build)
+
+        projection = (args.icosohedral, args.cylindrical, args.cut_point)
+        if meshes[0].Projection == projection:
+            return meshes[0].R_mm, [(mesh.Nodes, mesh.Edges, mesh.Triangles) for mesh in meshes]
+
+        # New node arrays from the flat points, the cached build keeps the
+        # projection it was made with
+        node_dtype = GM.Node_Dtype(args.precision)
+        with I.Stage("projection"):
+            return meshes[0].R_mm, [(GM.Project_Points(mesh.Flat_Nodes, mesh.R_mm, *projection, dtype=node_dtype),
+                                     mesh.Edges, mesh.Triangles) for mesh in meshes]
+
+    built_radius, levels = cache.Stage("projection", projection_inputs, project, P.Save_Levels, P.Load_Levels)
+
+    def scale():
+        # The nodes are in proportion to the radius
+        if args.radius == built_radius:
+            return levels
+        with I.Stage("scale"):
+            factor = args.radius / built_radius
+            return [((nodes * factor).astype(nodes.dtype, copy=False), edges, triangles) for nodes, edges, triangles in levels]
+
+    levels = cache.Stage("scale", scale_inputs, scale)
+
+    def merge():
+        merged = list()
+        for nodes, edges, triangles in levels:
+            with I.Stage("merge"):
+                merged.append(MG.Merge_Nodes(nodes, edges, triangles, args.merge_tolerance))
+        return merged
+
+    def truncate():
+        truncated = list()
+        for nodes, edges, triangles, merged in levels:
+            with I.Stage("truncate"):
+                truncated.append(T.Clip(nodes, edges, triangles, *plane, args.precision) + (merged,))
+        return truncated
+
+    if args.merge_tolerance > 0:
+        levels = cache.Stage("merge", merge_inputs, merge)
+    else:
+        levels = [level + (None,) for level in levels]
+
+    if plane is not None:
+        levels = cache.Stage("truncate", truncate_inputs, truncate)
+    else:
+        levels = [level[:3] + (None, level[3]) for level in levels]
+
+    written = list()
+
+    with Write_Pool(args.write_threads) as pool:
+        for freq, (nodes, edges, triangles, cuts, merged) in zip(frequencies, levels):
+
+            if merged is not None:
+                print("Merged " + str(merged[0]) + " nodes closer than " + str(args.merge_tolerance) + ", dropped "
+                      + str(merged[1]) + " edges and " + str(merged[2]) + " triangles")
+
+            # A mesh cut at a plane has a base like a dome, unless the plane
+            # misses it
+            bounded = args.dome
+
+            if cuts is not None:
+                bounded = bool(cuts[1] or cuts[2])
+                print("Truncated: " + str(cuts[0]) + " struts and " + str(cuts[1]) + " triangles cut at the plane, "
+                      + str(cuts[2]) + " triangles below it dropped")
+
+            if args.renumber != 'none':
+                with I.Stage("renumber"):
+                    nodes, edges, triangles = R.Renumber(args.renumber, nodes, edges, triangles)
+
+            if args.validate:
+                with I.Stage("validate"):
+                    V.Check(nodes, edges, triangles, bounded)
+
+            # The ring of nodes on the plane, in order round the base
+            base = None
+            if plane is not None and bounded:
+                base = T.Base_Ring(nodes, edges, triangles)
+
+            written.append((nodes, edges, triangles))
 
-        point = ((float(x), float(y), float(z)))
-        sorted_points.append(point)
+            directory = args.out.format(**dict(vars(args), frequency=freq))
+            if args.levels > 1 and '{frequency}' not in args.out:
+                directory = os.path.join(directory, 'f' + str(freq))
 
-edge_number_list = []
+            # The files are written on the pool while the statistics are
+            # worked out, the output stage is the writing left after them
+            with I.Stage("output"):
+                pending = W.Write_Files(directory, args.formats or ['txt'], nodes, edges, triangles, stream, base, pool,
+                                        args.compress)
 
+            with I.Stage("statistics"):
+                Print_Statistics(nodes, edges)
 
-for e in gs.Edge_List:
-    #print(type(e))
-    edge_number_list.append(e.Get_Edge_Number())
+            with I.Stage("output"):
+                W.Wait(pending)
 
-#Uncomment this block if abaqus throws an error complaining about not being able to draw a line between points further
-#than 1e-6 apart
+            print("Files updated successfully")
 
-# for i in edge_number_list:
-#     if i[0] == i[1]:
-#         edge_number_list.remove(i)
+    report = cache.Report()
+    if report:
+        print(report)
 
+    if args.timings or args.count_ops:
+        I.Report(len(nodes), len(edges), len(triangles))
 
-points_hash = gs.Point_Hash
-edge_list = gs.Updated_Edge_List
-triangle_list = []
-hub_dict = {}
-non_duplicates = []
-for i in points_hash:
-    #print(i)
-    hub_dict[i.point_number] = i.get_points()
+    return written
 
 
-for a in range(1, len(hub_dict)):
-    for b in range(1, len(hub_dict)):
-        for c in range(1, len(hub_dict)):
-            if b in hub_dict[a] and c in hub_dict[a] and b in hub_dict[c]:
-                triangle_list.append(sorted([a, b, c]))
-                #print("added")
+def main(argv=None):
 
+    parser = Build_Parser()
+    args = parser.parse_args(argv)
 
-[non_duplicates.append(x) for x in triangle_list if x not in non_duplicates and x[0] is not x[1] and x[1] is not x[2] and x[0] is not x[2]]
+    runs = Read_Batch(parser, args) if args.batch else [args]
 
+    if args.count_ops:
+        I.Enable_Counters()
 
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
 
-# print("Node list:")
-# for i in spherical_points:
-#     print(i)
+    results = list()
 
-#Warning: only use this set of nodes if you intend to produce an icosahedral geodesic dome
-#print("Node List")
-#print(unsorted_points)
+    # Stages are reused between the domes of a batch, see Pipeline.py
+    cache = P.Cache(args.cache)
 
-# print("Edge List:")
-# for i in edge_number_list:
-#     #print(i)
+    try:
+        for run in runs:
+            # A truncated dome is cut from the whole sphere
+            if run.truncate is not None or run.truncate_plane is not None:
+                run.dome = False
 
-if CF.Icosohedral == False:
-    with open('Nodes.txt', 'w') as fp:
-        fp.write('\n'.join('{} {} {}'.format(x[0],x[1],x[2]) for x in sorted_points))
-else:
-    with open('Nodes.txt', 'w') as fp:
-        fp.write('\n'.join('{} {} {}'.format(x[0],x[1],x[2]) for x in sorted_points))
+            if run.plan:
+                Print_Plan(Plan_Dome(run, run.stream))
+            else:
+                results += Run_Dome(run, cache)
 
-with open('Edges.txt', 'w') as fp:
-    fp.write('\n'.join('{} {}'.format(x[0],x[1]) for x in edge_number_list))
-with open('Triangles.txt', 'w') as fp:
-    fp.write('\n'.join('{} {}'.format(x[0],x[1],x[2]) for x in non_duplicates))
+    finally:
+        if args.count_ops:
+            I.Disable_Counters()
 
-print("Files updated successfully")
+        if args.cprofile:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
 
-total_beam = 0
-bar_length_list = []
-for i in edge_number_list:
-    node_number1 = i[0]
-    node_number2 = i[1]
-    #print(node_number2)
-    node_coordinate1 = sorted_points[node_number1 - 1]
-    node_coordinate2 = sorted_points[node_number2 - 1]
-    bar_length = (((node_coordinate1[0] - node_coordinate2[0]) ** 2) + ((node_coordinate1[1] - node_coordinate2[1]) ** 2) + ((node_coordinate1[2] - node_coordinate2[2]) ** 2)) ** .5
-    total_beam += bar_length
-    bar_length_list.append(bar_length)
+    return results
 
-std_dev = statistics.pstdev(bar_length_list)
 
-print("Total bar length: " + str(total_beam) + " meters")
-print("Member Count: " + str(len(edge_number_list) + 1))
-print("Average Member Length: " + str(total_beam / (len(edge_number_list) + 1)))
-print("Bar Length Standard Deviation: " + str(std_dev))
-print("Percent Deviation: " + str(round(100 * std_dev / (total_beam / (len(edge_number_list) + 1)), 2)), '%')
\ No newline at end of file
+if __name__ == '__main__':
+    try:
+        main()
+    except (ImportError, MemoryError, ValueError) as err:
+        sys.exit(str(err))
@@ -79,6 +79,12 @@ class Edge:
             self.x2 = x
 
 
+    def Get_Key(self):
+
+        # Edges are equal when their keys are equal, see __eq__, in either
+        # direction
+        return frozenset( ( self.x1.Get_Key(), self.x2.Get_Key() ) )
+
     def __eq__(self, other):
 
         fnd = False
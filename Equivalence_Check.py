@@ -0,0 +1,304 @@
+#! /usr/bin/env python
+# -*- python -*-
+
+# ----------------------------------------------------------------
+# Golden output check of the array engine (GeoMesh.py) against the
+# object based GeoSphere pipeline in DomeGenerator.py
+#
+# Both are built for a matrix of (frequency, Dome_calc, Icosohedral,
+# Cylindrical, Cut_Point). Node numbering differs between the two, so
+# every node of the array engine is matched to the legacy node at the same
+# place, then the edge and triangle sets are compared through that match.
+# The legacy pipeline can keep two copies of a point a few 1e-11 apart
+# (Point_Hash hashes the exact Decimal values), those copies are merged
+# first.
+#
+# The triangles of both engines are compared with their winding: the
+# legacy ones from DomeGenerator.Find_Triangles must be the fast ones
+# through the match, in the same cyclic order, and every triangle of
+# either must face out, (b - a) x (c - a) . centroid > 0, as the S3
+# elements of Dome.inp need. The cylinder moves the bottom vertex of a
+# sphere off the axis (cart2cyl), which folds a triangle at it in both
+# engines, so the triangles at that node are not held to facing out.
+#
+# The array engine is also built in its symmetric mode (one face rotated
+# into the other 19), which must give the same mesh.
+#
+#   python Equivalence_Check.py
+#   python Equivalence_Check.py --frequencies 2 4 8 --tolerance 1e-6
+#
+# The exit status is 1 when any case differs.
+# ----------------------------------------------------------------
+
+import argparse
+import itertools
+import math
+import sys
+import time
+
+import numpy as np
+
+import config as CF
+import DomeGenerator as DG
+import GeoMesh as GM
+import Instrument as I
+
+
+FREQUENCIES = (1, 2, 3, 4, 5, 6)
+
+# (Icosohedral, Cylindrical) combinations and the cut points tried with the
+# cylindrical ones, Cut_Point is not used otherwise
+SHAPES = ((False, False), (True, False), (False, True), (True, True))
+CUT_POINTS = (0.3, 0.8)
+
+
+class Grid:
+    # Points hashed into cubes of side tol, for finding the point within
+    # tol of another one without comparing against every point
+
+    def __init__(self, tol):
+        self.tol = tol
+        self.cells = dict()
+        self.points = list()
+
+    def Cell(self, p):
+        return tuple(int(math.floor(v / self.tol)) for v in p)
+
+    def Add(self, p):
+        self.cells.setdefault(self.Cell(p), list()).append(len(self.points))
+        self.points.append(p)
+        return len(self.points) - 1
+
+    def Find(self, p):
+        # Number of the closest point within tol, or None
+
+        best = None
+        best_d = self.tol
+
+        cx, cy, cz = self.Cell(p)
+        for dx, dy, dz in itertools.product((-1, 0, 1), repeat=3):
+            for n in self.cells.get((cx + dx, cy + dy, cz + dz), ()):
+                d = math.sqrt(sum((a - b) ** 2 for a, b in zip(p, self.points[n])))
+                if d <= best_d:
+                    best, best_d = n, d
+
+        return best
+
+
+def Triangles_Of_Edges(edges):
+    # Every set of three nodes all joined to each other
+
+    joined = dict()
+    for e in edges:
+        u, v = e
+        joined.setdefault(u, set()).add(v)
+        joined.setdefault(v, set()).add(u)
+
+    triangles = set()
+    for e in edges:
+        u, v = e
+        for w in joined[u] & joined[v]:
+            triangles.add(frozenset((u, v, w)))
+
+    return triangles
+
+
+def Wound(rows, number):
+    # Triangles as node triples through number, rotated to start at the
+    # lowest node so the winding is kept. Triangles that lose a corner are
+    # left out.
+
+    result = set()
+    for row in rows:
+        key = [number(v) for v in row]
+        if len(set(key)) == len(key):
+            k = key.index(min(key))
+            result.add(tuple(key[k:] + key[:k]))
+
+    return result
+
+
+def Facing_In(nodes, triangles, exempt=None):
+    # Number of triangles whose normal does not point out through their
+    # centroid, those at node exempt not counted
+
+    nodes = np.asarray(nodes, dtype=np.float64).reshape(-1, 3)
+    triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+
+    P = nodes[triangles]
+    normal = np.cross(P[:, 1] - P[:, 0], P[:, 2] - P[:, 0])
+    inward = np.einsum('ij,ij->i', normal, P.mean(axis=1)) <= 0
+
+    if exempt is not None:
+        inward &= ~(triangles == exempt).any(axis=1)
+
+    return int(np.count_nonzero(inward))
+
+
+def Build_Legacy(freq, rad, dome_calc, icosohedral, cylindrical, cut_point):
+
+    CF.frequency_n = freq
+    CF.R_mm = rad
+    CF.Dome_calc = dome_calc
+    CF.Icosohedral = icosohedral
+    CF.Cylindrical = cylindrical
+    CF.Cut_Point = cut_point
+
+    start = time.perf_counter()
+    gs, sorted_points, edge_number_list, triangles = DG.Generate()
+    elapsed = time.perf_counter() - start
+
+    return sorted_points, edge_number_list, triangles, elapsed
+
+
+def Build_Fast(freq, rad, dome_calc, icosohedral, cylindrical, cut_point, symmetric=False):
+
+    start = time.perf_counter()
+    mesh = GM.Build(freq, rad, dome_calc, icosohedral, cylindrical, cut_point, symmetric=symmetric)
+    elapsed = time.perf_counter() - start
+
+    return mesh, elapsed
+
+
+def Compare(case, rad, tol):
+    # Build both engines for one case and return the result line fields
+
+    dome_calc, cylindrical = case[2], case[4]
+
+    legacy_points, legacy_edges, legacy_tris, t_legacy = Build_Legacy(*case)
+    mesh, t_fast = Build_Fast(*case)
+    symmetric, t_symmetric = Build_Fast(*case, symmetric=True)
+
+    problems = list()
+
+    if (len(symmetric.Nodes) != len(mesh.Nodes) or np.abs(symmetric.Nodes - mesh.Nodes).max() > tol
+            or not np.array_equal(symmetric.Edges, mesh.Edges) or not np.array_equal(symmetric.Triangles, mesh.Triangles)):
+        problems.append("symmetric mode differs")
+
+    # Merge the legacy copies of the same point
+    grid = Grid(tol)
+    legacy_node = list()
+    for p in legacy_points:
+        n = grid.Find(p)
+        if n is None:
+            n = grid.Add(p)
+        legacy_node.append(n)
+
+    duplicates = len(legacy_points) - len(grid.points)
+
+    # Match every array node to a legacy node
+    match = np.full(len(mesh.Nodes), -1, dtype=np.int64)
+    deviation = 0.0
+    for k, p in enumerate(mesh.Nodes.tolist()):
+        n = grid.Find(p)
+        if n is not None:
+            match[k] = n
+            deviation = max(deviation, math.sqrt(sum((a - b) ** 2 for a, b in zip(p, grid.points[n]))))
+
+    if len(mesh.Nodes) != len(grid.points):
+        problems.append("V {} != {}".format(len(mesh.Nodes), len(grid.points)))
+    if (match < 0).any():
+        problems.append("{} nodes unmatched".format(int((match < 0).sum())))
+    elif len(np.unique(match)) != len(match):
+        problems.append("nodes matched twice")
+
+    # Compare connectivity through the match, legacy numbers are 1 based
+    def canonical(rows, number):
+        result = set()
+        for row in rows:
+            key = frozenset(number(v) for v in row)
+            if len(key) == len(row):
+                result.add(key)
+        return result
+
+    fast_edges = canonical(mesh.Edges.tolist(), lambda v: int(match[v]))
+    old_edges = canonical(legacy_edges, lambda v: legacy_node[v - 1])
+    if fast_edges != old_edges:
+        problems.append("edges differ (+{} -{})".format(len(fast_edges - old_edges), len(old_edges - fast_edges)))
+
+    # Every triangle of the merged edge graph is a face of the sphere
+    fast_tris = canonical(mesh.Triangles.tolist(), lambda v: int(match[v]))
+    old_tris = Triangles_Of_Edges(old_edges)
+    if fast_tris != old_tris:
+        problems.append("triangles differ (+{} -{})".format(len(fast_tris - old_tris), len(old_tris - fast_tris)))
+
+    # The triangles the legacy pipeline found itself, with their winding
+    fast_wound = Wound(mesh.Triangles.tolist(), lambda v: int(match[v]))
+    old_wound = Wound(legacy_tris, lambda v: legacy_node[v - 1])
+    if canonical(old_wound, lambda v: v) != fast_tris:
+        problems.append("legacy triangles differ (+{} -{})".format(
+            len(canonical(old_wound, lambda v: v) - fast_tris), len(fast_tris - canonical(old_wound, lambda v: v))))
+    elif old_wound != fast_wound:
+        problems.append("{} triangles wound the other way".format(len(old_wound - fast_wound)))
+
+    # Node at the bottom of a cylindrical sphere, moved off the axis
+    fast_exempt = legacy_exempt = None
+    if cylindrical and not dome_calc:
+        fast_exempt = int(np.argmin(mesh.Nodes[:, 2]))
+        legacy_exempt = int(np.argmin(np.asarray(legacy_points).reshape(-1, 3)[:, 2]))
+
+    inward = Facing_In(mesh.Nodes, mesh.Triangles, fast_exempt)
+    if inward:
+        problems.append("{} fast triangles face in".format(inward))
+
+    inward = Facing_In(legacy_points, np.array(legacy_tris) - 1, legacy_exempt)
+    if inward:
+        problems.append("{} legacy triangles face in".format(inward))
+
+    return (len(mesh.Nodes), len(fast_edges), len(fast_tris), duplicates, deviation,
+            t_legacy, t_fast, problems)
+
+
+def Cases(frequencies, rad, default_cut):
+
+    for freq in frequencies:
+        for dome_calc in (False, True):
+            for icosohedral, cylindrical in SHAPES:
+                cut_points = CUT_POINTS if cylindrical else (default_cut,)
+                for cut_point in cut_points:
+                    yield (freq, rad, dome_calc, icosohedral, cylindrical, cut_point)
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Compare the array engine with the GeoSphere pipeline.")
+    parser.add_argument('--frequencies', type=int, nargs='+', default=list(FREQUENCIES))
+    parser.add_argument('--radius', type=float, default=CF.R_mm)
+    parser.add_argument('--tolerance', type=float, default=1e-6, help="allowed node distance, relative to the radius")
+    args = parser.parse_args(argv)
+
+    tol = args.tolerance * args.radius
+    failures = 0
+    t_legacy_total = 0.0
+    t_fast_total = 0.0
+
+    print ("{:>4} {:>5} {:>5} {:>5} {:>5} {:>6} {:>6} {:>6} {:>5} {:>10} {:>9}   {}".format(
+        "freq", "dome", "ico", "cyl", "cut", "V", "E", "F", "dup", "max dev", "speedup", "result"))
+
+    for case in Cases(args.frequencies, args.radius, CF.Cut_Point):
+
+        I.Reset()
+        nV, nE, nF, dup, dev, t_legacy, t_fast, problems = Compare(case, args.radius, tol)
+
+        t_legacy_total += t_legacy
+        t_fast_total += t_fast
+        if problems:
+            failures += 1
+
+        freq, rad, dome_calc, icosohedral, cylindrical, cut_point = case
+        print ("{:>4} {:>5} {:>5} {:>5} {:>5} {:>6} {:>6} {:>6} {:>5} {:>10.2e} {:>8.1f}x   {}".format(
+            freq, str(dome_calc), str(icosohedral), str(cylindrical), cut_point,
+            nV, nE, nF, dup, dev, t_legacy / t_fast, "; ".join(problems) if problems else "ok"))
+
+    print ("\nTotal speedup: {:.1f}x".format(t_legacy_total / t_fast_total))
+
+    if failures:
+        print ("FAILED: {} case(s) differ".format(failures))
+        return 1
+
+    print ("All cases equivalent")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,682 @@
+# Array based geodesic sphere
+#
+# Builds the same dome as GeoSphere/DomeGenerator, but holds the nodes,
+# edges and triangles in numpy arrays instead of Coordinates/Edge objects.
+#
+# Every point of the face subdivision gets its node number from its place
+# in the lattice, so points shared by two faces never need to be searched
+# for and deduped:
+#
+#   0 .. 11                           the icosahedron vertices a..l
+#   12 + edge * (n-1) + t - 1         t-th point along icosahedron edge
+#   12 + 30(n-1) + face * m + k       k-th point inside the face
+#
+# with m = (n-1)(n-2)/2 inside points per face. V = 10n^2 + 2.
+
+import math as M
+
+import numpy as np
+
+import cs
+import Instrument as I
+
+
+# Icosahedron faces as added in DomeGenerator.py, vertices a..l = 0..11
+ICOSA_FACES = np.array([
+    # Top 5 faces
+    (0, 1, 2), (0, 2, 3), (0, 3, 4), (0, 4, 5), (0, 5, 1),
+    # Middle faces
+    (9, 10, 2), (10, 3, 6), (6, 4, 7), (7, 5, 8), (8, 1, 9),
+    (2, 10, 3), (3, 6, 4), (4, 7, 5), (5, 8, 1), (1, 9, 2),
+    # Bottom faces
+    (11, 10, 9), (11, 9, 8), (11, 8, 7), (11, 7, 6), (11, 6, 10),
+])
+
+# The 30 icosahedron edges, lowest vertex first
+ICOSA_EDGES = np.unique(np.sort(ICOSA_FACES[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2), axis=1), axis=0)
+
+# Number of each icosahedron edge, looked up by its two vertices
+EDGE_INDEX = np.full((12, 12), -1, dtype=np.int64)
+EDGE_INDEX[ICOSA_EDGES[:, 0], ICOSA_EDGES[:, 1]] = np.arange(len(ICOSA_EDGES))
+EDGE_INDEX[ICOSA_EDGES[:, 1], ICOSA_EDGES[:, 0]] = np.arange(len(ICOSA_EDGES))
+
+# Points closer than this to the z = 0 plane (relative to the radius) are
+# treated as on it, like the 1e-10 quantization of Coordinates
+TINY = 1e-9
+
+# Dtype policies. 'double' (float64 nodes, int64 node numbers) is what the
+# Abaqus input gets, 'compact' (float32 nodes, the smallest integer type
+# holding the node numbers) halves the memory and file size of previews.
+PRECISIONS = ('double', 'compact')
+
+# Bytes of the int64 node numbers used while the mesh is built
+BUILD_INDEX_BYTES = 8
+
+
+def Icosahedron_Vertices(rad):
+    # Vertices a..l, same equations as DomeGenerator.py
+    #   http://www.vb-helper.com/tutorial_platonic_solids.html
+
+    t2_rad = M.pi / 10
+    t4_rad = M.pi / 5
+
+    S_mm = 2 * rad * M.sin(t4_rad)      # Side Length
+    H_mm = M.cos(t4_rad) * rad          # Height of triangle
+
+    Cx_mm = rad * M.cos(t2_rad)
+    Cy_mm = rad * M.sin(t2_rad)
+
+    H1_mm = M.sqrt(S_mm * S_mm - rad * rad)
+    H2_mm = M.sqrt((H_mm + rad) * (H_mm + rad) - (H_mm * H_mm))
+
+    Z2_mm = (H2_mm - H1_mm) / 2         # Coordinate of points (b-f)
+    Z1_mm = Z2_mm + H1_mm               # Coordinate of point (a)
+
+    return np.array([
+        (0, 0, Z1_mm),                  # a
+        (0, rad, Z2_mm),                # b
+        (Cx_mm, Cy_mm, Z2_mm),          # c
+        (S_mm / 2, -H_mm, Z2_mm),       # d
+        (-S_mm / 2, -H_mm, Z2_mm),      # e
+        (-Cx_mm, Cy_mm, Z2_mm),         # f
+        (0, -rad, -Z2_mm),              # g
+        (-Cx_mm, -Cy_mm, -Z2_mm),       # h
+        (-S_mm / 2, H_mm, -Z2_mm),      # i
+        (S_mm / 2, H_mm, -Z2_mm),       # j
+        (Cx_mm, -Cy_mm, -Z2_mm),        # k
+        (0, 0, -Z1_mm),                 # l
+    ], dtype=np.float64)
+
+
+def Node_Dtype(precision):
+    # Coordinate dtype of the nodes
+
+    if precision not in PRECISIONS:
+        raise ValueError("Unknown precision '" + precision + "', use one of " + ", ".join(PRECISIONS))
+
+    return np.dtype(np.float32 if precision == 'compact' else np.float64)
+
+
+def Index_Dtype(nV, precision):
+    # Node number dtype for nV nodes. uint16 is only used while the 1 based
+    # numbers of the text files fit in it as well.
+
+    if precision not in PRECISIONS:
+        raise ValueError("Unknown precision '" + precision + "', use one of " + ", ".join(PRECISIONS))
+
+    if precision == 'double':
+        return np.dtype(np.int64)
+    if nV < 2 ** 16:
+        return np.dtype(np.uint16)
+    if nV < 2 ** 31:
+        return np.dtype(np.int32)
+    return np.dtype(np.int64)
+
+
+def Sphere_Counts(freq):
+    # Exact node, edge and triangle counts of the full sphere
+
+    return 10 * freq * freq + 2, 30 * freq * freq, 20 * freq * freq
+
+
+def Dome_Count_Bounds(freq):
+    # Upper bounds of the dome counts. The flat icosahedron is symmetric
+    # through its centre, so the dome is half the sphere plus the nodes,
+    # edges and triangles of the band along the Z plane, which crosses the
+    # 10 middle faces once each.
+
+    return 5 * freq * freq + 5 * freq + 2, 15 * freq * freq + 15 * freq, 10 * freq * freq + 10 * freq
+
+
+def Plan(freq, dome_calc, precision='double'):
+    # Sizes of the mesh Build would make, found before anything is built.
+    # Counts are exact for spheres and upper bounds for domes. mesh_bytes is
+    # the memory of the finished arrays, peak_bytes that of the largest
+    # point of the build: while the edges are found (flat points, int64
+    # triangles and two copies of the edge keys) or when the node numbers
+    # are converted to the index dtype at the end.
+
+    if dome_calc:
+        nV, nE, nF = Dome_Count_Bounds(freq)
+    else:
+        nV, nE, nF = Sphere_Counts(freq)
+
+    node_dtype = Node_Dtype(precision)
+    index_dtype = Index_Dtype(nV, precision)
+
+    flat = nV * 3 * 8
+    nodes = nV * 3 * node_dtype.itemsize
+    edges = nE * 2 * BUILD_INDEX_BYTES
+    triangles = nF * 3 * BUILD_INDEX_BYTES
+    keys = nF * 3 * 8
+
+    converted = 0
+    if index_dtype.itemsize != BUILD_INDEX_BYTES:
+        converted = (nE * 2 + nF * 3) * index_dtype.itemsize
+
+    return {
+        'frequency': freq,
+        'nodes': nV,
+        'edges': nE,
+        'triangles': nF,
+        'exact': not dome_calc,
+        'node_dtype': node_dtype,
+        'index_dtype': index_dtype,
+        'mesh_bytes': nodes + (nE * 2 + nF * 3) * index_dtype.itemsize,
+        'peak_bytes': max(flat + triangles + 2 * keys, flat + edges + triangles + nodes + converted),
+    }
+
+
+def Lattice(freq):
+    # Local coordinates (i, j) of the points of one face divided freq times.
+    # The point is a + i * (b - a) / freq + j * (c - a) / freq, as in
+    # IcoFace.Get_Edges_Equal_Distance.
+
+    i, j = np.meshgrid(np.arange(freq + 1), np.arange(freq + 1), indexing='ij')
+    inside = (i + j) <= freq
+
+    return i[inside], j[inside]
+
+
+def Lattice_Index(freq, i, j):
+    # Position of (i, j) in the arrays returned by Lattice()
+    return i * (freq + 1) - (i * (i - 1)) // 2 + j
+
+
+def Lattice_Triangles(freq):
+    # The freq^2 small triangles of one face as lattice positions, all
+    # wound the same way round as the face (a, b, c)
+
+    i, j = Lattice(freq)
+
+    up = (i + j) <= freq - 1
+    iu, ju = i[up], j[up]
+    tri_up = np.stack([Lattice_Index(freq, iu, ju),
+                       Lattice_Index(freq, iu + 1, ju),
+                       Lattice_Index(freq, iu, ju + 1)], axis=1)
+
+    down = (i + j) <= freq - 2
+    idn, jdn = i[down], j[down]
+    tri_down = np.stack([Lattice_Index(freq, idn + 1, jdn),
+                         Lattice_Index(freq, idn + 1, jdn + 1),
+                         Lattice_Index(freq, idn, jdn + 1)], axis=1)
+
+    return np.concatenate([tri_up, tri_down])
+
+
+def Face_Triangles(freq):
+    # Lattice_Triangles of every face of ICOSA_FACES, (20, freq^2, 3), wound
+    # counterclockwise seen from outside the sphere. The faces are not all
+    # listed that way round, those that are not get their triangles turned
+    # over, so shell elements made from them all face out.
+
+    corners = Icosahedron_Vertices(1.0)[ICOSA_FACES]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    outward = np.einsum('fd,fd->f', normals, corners.sum(axis=1)) > 0
+
+    tri = Lattice_Triangles(freq)
+
+    return np.where(outward[:, None, None], tri[None], tri[None][:, :, [0, 2, 1]])
+
+
+def Lattice_Node_Numbers(freq, faces, face_numbers=None):
+    # Global node number of every lattice point of every face, shape
+    # (len(faces), points per face). face_numbers gives the position of
+    # each face in ICOSA_FACES, used to number the points inside it.
+
+    if face_numbers is None:
+        face_numbers = np.arange(len(faces))
+
+    i, j = Lattice(freq)
+    W = np.stack([freq - i - j, i, j], axis=1)      # weights on a, b, c
+    nonzero = np.count_nonzero(W, axis=1)
+
+    ids = np.empty((len(faces), len(i)), dtype=np.int64)
+
+    # Icosahedron vertices
+    corner = nonzero == 1
+    ids[:, corner] = faces[:, np.argmax(W[corner], axis=1)]
+
+    # Points along an icosahedron edge, counted from its lower vertex
+    edge = np.nonzero(nonzero == 2)[0]
+    if len(edge):
+        order = np.argsort(W[edge] == 0, axis=1, kind='stable')
+        p, q = order[:, 0], order[:, 1]
+        U = faces[:, p]
+        V = faces[:, q]
+        t = np.where(V > U, W[edge, q], W[edge, p])
+        ids[:, edge] = 12 + EDGE_INDEX[U, V] * (freq - 1) + t - 1
+
+    # Points inside the face
+    inside = np.nonzero(nonzero == 3)[0]
+    if len(inside):
+        ii, jj = i[inside], j[inside]
+        local = (ii - 1) * (freq - 1) - ((ii - 1) * ii) // 2 + jj - 1
+        per_face = ((freq - 1) * (freq - 2)) // 2
+        ids[:, inside] = 12 + 30 * (freq - 1) + face_numbers[:, None] * per_face + local[None, :]
+
+    return ids
+
+
+def Edges_From_Triangles(triangles, nV, out=None):
+    # Unique edges of a triangle list, lowest node first. out is an (E, 2)
+    # int64 array to fill, for callers that know E in advance.
+
+    pairs = triangles[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2).astype(np.int64, copy=False)
+
+    keys = np.minimum(pairs[:, 0], pairs[:, 1]) * nV + np.maximum(pairs[:, 0], pairs[:, 1])
+
+    # Sort and keep the first of each run, much faster than np.unique on
+    # millions of keys
+    keys = np.sort(keys)
+    keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+
+    if out is None:
+        out = np.empty((len(keys), 2), dtype=np.int64)
+
+    np.divmod(keys, nV, out=(out[:, 0], out[:, 1]))
+
+    return out
+
+
+def Project_Points(flat, rad, icosohedral, cylindrical, cut_point, dtype=np.float64):
+    # Push the flat points out onto the sphere and/or cylinder, same rules
+    # as DomeGenerator.Project_Points. The points are scaled along their
+    # radius instead of going through spherical/cylindrical coordinates.
+    # The cut is decided on the float64 flat points, the projection is
+    # done in dtype.
+
+    points = flat.astype(dtype, copy=False)
+    cylindrical_radius = ((rad ** 2) - ((rad * cut_point) ** 2)) ** .5
+
+    # Points within TINY of the cut height count as on it, as they do
+    # after the 1e-10 quantization of Coordinates
+    low = flat[:, 2] < rad * cut_point - TINY * rad
+
+    if not cylindrical and not icosohedral:
+        return cs.project_sphere(points, rad)
+
+    elif cylindrical and icosohedral:
+        return cs.project_cylinder(points, cylindrical_radius, where=low)
+
+    elif cylindrical and not icosohedral:
+        nodes = cs.project_cylinder(points, cylindrical_radius, where=low)
+        cs.project_sphere(points, rad, out=nodes, where=~low)
+        return nodes
+
+    else:
+        # Icosohedral only: keep the points on the flat faces
+        return points.copy()
+
+
+def Triangle_Sides(triangles, edges, nV, checked=False):
+    # Edge number of the sides (a, b), (b, c) and (c, a) of every triangle,
+    # shape (F, 3). edges must hold every side of every triangle, unless
+    # checked is set, which gives -1 for the sides that are not in it.
+
+    keys = np.minimum(edges[:, 0], edges[:, 1]).astype(np.int64) * nV + np.maximum(edges[:, 0], edges[:, 1])
+    order = np.argsort(keys)
+
+    p = triangles
+    q = np.roll(triangles, -1, axis=1)
+    side = np.minimum(p, q).astype(np.int64) * nV + np.maximum(p, q)
+
+    position = np.searchsorted(keys, side, sorter=order)
+
+    if not checked:
+        return order[position]
+
+    if not len(keys):
+        return np.full(side.shape, -1, dtype=np.int64)
+
+    number = order[np.minimum(position, len(keys) - 1)]
+    return np.where(keys[number] == side, number, -1)
+
+
+def Refine_Level(flat, triangles, edges, sides):
+    # Split every triangle in four at the midpoints of its edges. The
+    # midpoint of edge k becomes node V + k, so the midpoint cache is the
+    # edge list itself and the old nodes keep their numbers. The flat
+    # points of a face divided n times, split this way, are those of the
+    # face divided 2n times. sides is Triangle_Sides of the level.
+    #
+    # Returns the new flat points, triangles, edges and sides: V + E points,
+    # 4F triangles and 2E + 3F edges, numbered
+    #
+    #   k, E + k                      the halves of edge k, from its first node
+    #   2E + t, 2E + F + t, 2E + 2F + t   ab-bc, bc-ca and ca-ab inside triangle t
+    #
+    # so the sides of the new triangles are known without searching.
+
+    nV, nE, nF = len(flat), len(edges), len(triangles)
+    triangles = triangles.astype(np.int64, copy=False)
+    edges = edges.astype(np.int64, copy=False)
+
+    new_flat = np.empty((nV + nE, 3))
+    new_flat[:nV] = flat
+    np.add(flat[edges[:, 0]], flat[edges[:, 1]], out=new_flat[nV:])
+    new_flat[nV:] *= 0.5
+
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    e_ab, e_bc, e_ca = sides[:, 0], sides[:, 1], sides[:, 2]
+    ab, bc, ca = nV + e_ab, nV + e_bc, nV + e_ca
+
+    # The corner triangles and the middle one, wound as their parent
+    new_triangles = np.concatenate([
+        np.stack([a, ab, ca], axis=1),
+        np.stack([ab, b, bc], axis=1),
+        np.stack([ca, bc, c], axis=1),
+        np.stack([ab, bc, ca], axis=1)])
+
+    middle = nV + np.arange(nE)
+    new_edges = np.concatenate([
+        np.stack([edges[:, 0], middle], axis=1),
+        np.stack([middle, edges[:, 1]], axis=1),
+        np.stack([ab, bc], axis=1),
+        np.stack([bc, ca], axis=1),
+        np.stack([ca, ab], axis=1)])
+
+    def half(p, e):
+        # The half of edge e at its end p
+        return np.where(edges[e, 0] == p, e, nE + e)
+
+    t = np.arange(nF)
+    ab_bc, bc_ca, ca_ab = 2 * nE + t, 2 * nE + nF + t, 2 * nE + 2 * nF + t
+
+    new_sides = np.concatenate([
+        np.stack([half(a, e_ab), ca_ab, half(a, e_ca)], axis=1),
+        np.stack([half(b, e_ab), half(b, e_bc), ab_bc], axis=1),
+        np.stack([bc_ca, half(c, e_bc), half(c, e_ca)], axis=1),
+        np.stack([ab_bc, bc_ca, ca_ab], axis=1)])
+
+    return new_flat, new_triangles, new_edges, new_sides
+
+
+def Cull_Below(flat, triangles, edges, sides, min_z):
+    # Keep the triangles with a corner on or above min_z, which hold every
+    # edge a dome keeps, with the points and edges they use, renumbered in
+    # order. z is linear over a triangle, so no triangle split from a
+    # dropped one has a point up either. Returns the flat points,
+    # triangles, edges and sides, plus the old number of each point kept.
+
+    # np.compress and np.take select rows several times faster than a
+    # boolean or fancy index of the (N, 3) arrays
+    up = (flat[:, 2] >= min_z)[triangles].any(axis=1)
+    if not up.all():
+        triangles = np.compress(up, triangles, axis=0)
+        sides = np.compress(up, sides, axis=0)
+
+    keep = np.zeros(len(flat), dtype=bool)
+    keep[triangles.ravel()] = True
+    new_number = np.cumsum(keep) - 1
+
+    keep_edge = np.zeros(len(edges), dtype=bool)
+    keep_edge[sides.ravel()] = True
+    new_edge_number = np.cumsum(keep_edge) - 1
+
+    kept = np.nonzero(keep)[0]
+
+    return (np.take(flat, kept, axis=0), new_number[triangles], new_number[np.compress(keep_edge, edges, axis=0)],
+            new_edge_number[sides], kept)
+
+
+class GeoMesh:
+
+    def __init__(self, n, freq, rad, precision='double'):
+        self.name = n               # Text description of this sphere object
+        self.freq_n = freq          # Frequency of the sphere
+        self.R_mm = rad             # Circle radius in mm
+        self.precision = precision  # Dtype policy, one of PRECISIONS
+
+        self.Flat_Nodes = None      # (V, 3) float64 points on the icosahedron faces
+        self.Nodes = None           # (V, 3) final node coordinates, Node_Dtype
+        self.Edges = None           # (E, 2) node numbers, 0 based
+        self.Triangles = None       # (F, 3) node numbers, 0 based
+
+        self.Dome_calc = False      # Set by Subdivide_Dome
+        self.Projection = None      # (icosohedral, cylindrical, cut_point) given to Project
+
+        # (flat points, triangles, edges, sides, projected points) of the whole
+        # sphere, or for domes of the triangles with a point up, before the
+        # cut. Refine splits these, it is made on the first call.
+        self.Level = None
+
+    def Subdivide(self, symmetric=False):
+        # Divide all 20 faces by equal distance and number the points.
+        # symmetric divides only the reference face and rotates it into
+        # the other 19, see Symmetry.py.
+
+        n = self.freq_n
+        vertices = Icosahedron_Vertices(self.R_mm)
+
+        i, j = Lattice(n)
+        W = np.stack([n - i - j, i, j], axis=1)
+
+        ids = Lattice_Node_Numbers(n, ICOSA_FACES)
+
+        # Every array of the sphere is allocated once, at its final size
+        nV, nE, nF = Sphere_Counts(n)
+        self.Flat_Nodes = np.empty((nV, 3))
+
+        if not symmetric:
+            # Every lattice point of every face at once
+            points = np.einsum('pk,fkd->fpd', W / float(n), vertices[ICOSA_FACES])
+            self.Flat_Nodes[ids.ravel()] = points.reshape(-1, 3)
+
+        else:
+            import Symmetry as S
+
+            rotations, corner_orders = S.Face_Maps(vertices)
+
+            reference = (W / float(n)) @ vertices[ICOSA_FACES[S.REFERENCE_FACE]]
+            points = cs.mx_apply(rotations, reference)
+
+            target = S.Lattice_Targets(n, corner_orders)
+            self.Flat_Nodes[np.take_along_axis(ids, target, axis=1).ravel()] = points.reshape(-1, 3)
+
+        self.Triangles = np.take_along_axis(ids[:, :, None], Face_Triangles(n), axis=1).reshape(nF, 3)
+        self.Edges = Edges_From_Triangles(self.Triangles, nV, out=np.empty((nE, 2), dtype=np.int64))
+
+    def Subdivide_Dome(self, symmetric=False):
+        # Same mesh as Subdivide followed by Cut_Dome, but the faces and small
+        # triangles with no edge on or above the Z plane are never built.
+        # z is linear over a face, so it is found for every lattice point
+        # from the corner heights alone, before any point is placed.
+
+        n = self.freq_n
+        vertices = Icosahedron_Vertices(self.R_mm)
+        min_z = -TINY * self.R_mm
+
+        self.Dome_calc = True
+
+        i, j = Lattice(n)
+        W = np.stack([n - i - j, i, j], axis=1)
+        tri = Lattice_Triangles(n)
+
+        # Faces with a corner on or above the plane, the others are below it
+        corner_z = vertices[ICOSA_FACES, 2]
+        faces = np.nonzero(corner_z.max(axis=1) >= min_z)[0]
+
+        ids = Lattice_Node_Numbers(n, ICOSA_FACES[faces], faces)
+        up = ((W / float(n)) @ corner_z[faces].T).T >= min_z
+
+        # Only small triangles with two points up can hold a kept edge
+        near_f, near_t = np.nonzero(np.count_nonzero(up[:, tri], axis=2) >= 2)
+        triangles = ids[near_f[:, None], Face_Triangles(n)[faces[near_f], near_t]]
+
+        nV = Sphere_Counts(n)[0]
+        node_up = np.zeros(nV, dtype=bool)
+        node_up[ids[up]] = True
+
+        edges = Edges_From_Triangles(triangles, nV)
+        edges = edges[node_up[edges].all(axis=1)]
+        triangles = triangles[node_up[triangles].all(axis=1)]
+
+        # Keep the points the edges use and renumber them like Cut_Dome
+        keep = np.zeros(nV, dtype=bool)
+        keep[edges.ravel()] = True
+        new_number = np.cumsum(keep) - 1
+
+        self.Edges = new_number[edges]
+        self.Triangles = new_number[triangles]
+
+        # Place only the lattice points that are kept
+        f, p = np.nonzero(up)
+        number = ids[f, p]
+        used = keep[number]
+        f, p, number = f[used], p[used], new_number[number[used]]
+
+        self.Flat_Nodes = np.empty((new_number[-1] + 1, 3))
+
+        if not symmetric:
+            points = np.einsum('pk,pkd->pd', W[p] / float(n), vertices[ICOSA_FACES[faces[f]]])
+
+        else:
+            import Symmetry as S
+
+            rotations, corner_orders = S.Face_Maps(vertices)
+            reference = (W / float(n)) @ vertices[ICOSA_FACES[S.REFERENCE_FACE]]
+
+            source = np.argsort(S.Lattice_Targets(n, corner_orders), axis=1)
+            points = np.einsum('pij,pj->pi', rotations[faces[f]], reference[source[faces[f], p]])
+
+        self.Flat_Nodes[number] = points
+
+    def Cut_Dome(self):
+        # For domes ignore any edges below the Z plane, then drop the points
+        # no edge uses any more and renumber the rest. Subdivide_Dome gives
+        # the same without building the part below the plane.
+
+        below = self.Flat_Nodes[:, 2] < -TINY * self.R_mm
+
+        keep_edge = ~(below[self.Edges[:, 0]] | below[self.Edges[:, 1]])
+        self.Edges = np.compress(keep_edge, self.Edges, axis=0)
+
+        keep = np.zeros(len(self.Flat_Nodes), dtype=bool)
+        keep[self.Edges.ravel()] = True
+
+        keep_tri = keep[self.Triangles].all(axis=1)
+        self.Triangles = np.compress(keep_tri, self.Triangles, axis=0)
+
+        new_number = np.cumsum(keep) - 1
+        self.Flat_Nodes = np.compress(keep, self.Flat_Nodes, axis=0)
+        self.Edges = new_number[self.Edges]
+        self.Triangles = new_number[self.Triangles]
+
+        if self.Nodes is not None:
+            self.Nodes = np.compress(keep, self.Nodes, axis=0)
+
+    def Project(self, icosohedral, cylindrical, cut_point):
+        # Project the flat points in the node dtype, see Project_Points
+
+        self.Projection = (icosohedral, cylindrical, cut_point)
+        self.Nodes = Project_Points(self.Flat_Nodes, self.R_mm, icosohedral, cylindrical, cut_point,
+                                    Node_Dtype(self.precision))
+
+    def Base_Level(self):
+        # Level of this frequency for Refine, from a whole sphere
+
+        sphere = GeoMesh(self.name, self.freq_n, self.R_mm, self.precision)
+        sphere.Subdivide()
+
+        flat, triangles, edges = sphere.Flat_Nodes, sphere.Triangles, sphere.Edges
+        sides = Triangle_Sides(triangles, edges, len(flat))
+
+        if self.Dome_calc:
+            flat, triangles, edges, sides, kept = Cull_Below(flat, triangles, edges, sides, -TINY * self.R_mm)
+
+        projected = Project_Points(flat, self.R_mm, *self.Projection, dtype=Node_Dtype(self.precision))
+
+        return flat, triangles, edges, sides, projected
+
+    def Refine(self):
+        # The mesh of frequency 2n, made by splitting the triangles of this
+        # one instead of dividing the icosahedron again. Only the new
+        # midpoints are projected, the nodes of this level keep their
+        # numbers in the sphere. Same options as this mesh, which must have
+        # been projected. The points agree with a Build of 2n to rounding.
+
+        if self.Level is None:
+            self.Level = self.Base_Level()
+
+        flat, triangles, edges, sides, projected = self.Level
+        nV = len(flat)
+
+        flat, triangles, edges, sides = Refine_Level(flat, triangles, edges, sides)
+
+        midpoints = Project_Points(flat[nV:], self.R_mm, *self.Projection, dtype=projected.dtype)
+        projected = np.concatenate([projected, midpoints])
+
+        if self.Dome_calc:
+            flat, triangles, edges, sides, kept = Cull_Below(flat, triangles, edges, sides, -TINY * self.R_mm)
+            projected = projected[kept]
+
+        mesh = GeoMesh(self.name, 2 * self.freq_n, self.R_mm, self.precision)
+        mesh.Dome_calc = self.Dome_calc
+        mesh.Projection = self.Projection
+        mesh.Level = (flat, triangles, edges, sides, projected)
+
+        mesh.Flat_Nodes = flat
+        mesh.Nodes = projected
+        mesh.Edges = edges
+        mesh.Triangles = triangles
+
+        if self.Dome_calc:
+            mesh.Cut_Dome()
+
+        mesh.Convert_Dtypes()
+
+        return mesh
+
+    def Half_Edges(self):
+        # Half-edge structure of the mesh for neighbourhood queries, see
+        # HalfEdge.py
+
+        import HalfEdge as HE
+
+        return HE.HalfEdge(self.Triangles, self.Edges, len(self.Nodes))
+
+    def Plan(self, dome_calc):
+        # Sizes of the mesh this object would build, see Plan()
+        return Plan(self.freq_n, dome_calc, self.precision)
+
+    def Convert_Dtypes(self):
+        # Store the node numbers in the dtype of the precision policy, they
+        # are int64 while the mesh is built
+
+        dtype = Index_Dtype(len(self.Nodes), self.precision)
+
+        self.Nodes = self.Nodes.astype(Node_Dtype(self.precision), copy=False)
+        self.Edges = self.Edges.astype(dtype, copy=False)
+        self.Triangles = self.Triangles.astype(dtype, copy=False)
+
+
+def Build(freq, rad, dome_calc, icosohedral, cylindrical, cut_point, precision='double', symmetric=False):
+    # Run the whole array pipeline for one dome
+
+    mesh = GeoMesh("Sphere", freq, rad, precision)
+
+    with I.Stage("subdivide"):
+        if dome_calc:
+            mesh.Subdivide_Dome(symmetric)
+        else:
+            mesh.Subdivide(symmetric)
+
+    with I.Stage("projection"):
+        mesh.Project(icosohedral, cylindrical, cut_point)
+        mesh.Convert_Dtypes()
+
+    return mesh
+
+
+def Build_Ladder(freq, levels, rad, dome_calc, icosohedral, cylindrical, cut_point, precision='double', symmetric=False):
+    # Meshes of frequency freq, 2 freq, 4 freq ... (levels of them), each
+    # refined from the one before. Costs about as much as the last alone.
+
+    meshes = [Build(freq, rad, dome_calc, icosohedral, cylindrical, cut_point, precision, symmetric)]
+
+    for k in range(1, levels):
+        with I.Stage("refine"):
+            meshes.append(meshes[-1].Refine())
+
+    return meshes
@@ -23,6 +23,11 @@ class GeoSphere:
         self.Edge_List = list()
         self.Temp_Edge_List = list()
         self.Updated_Edge_List = list()
+
+        # Keys of the edges already in Temp_Edge_List / Edge_List so
+        # duplicates are found with a lookup rather than a scan of the list
+        self.Temp_Edge_Keys = set()
+        self.Edge_Keys = set()
         
         self.Edge_Count = {}
 
@@ -84,15 +89,21 @@ class GeoSphere:
 
     def Add_Face( self, a, b, c):
 
+        # For Domes a face with all three corners below the Z plane has no
+        # edge to keep, so it is not divided at all
+        if ( C.Dome_calc == True ) and ( max(a.z, b.z, c.z) < -C.TINY ):
+            return
+
         F1 = IF.IcoFace( a.name + b.name + c.name, self.freq_n)
         F1.Set_Vertices( a,b,c)
 
         self.FaceList.append( F1 )
 
         #----------------------------------------------------
-        # Use this function to divide faces by equal distance
+        # Use this function to divide faces by equal distance.
+        # For Domes the small triangles below the Z plane are skipped
         #
-        edge_list = F1.Get_Edges_Equal_Distance()
+        edge_list = F1.Get_Edges_Equal_Distance( -C.TINY if C.Dome_calc == True else None )
         
         #----------------------------------------------------
         # Use this function to divide faces by equal angle
@@ -101,21 +112,19 @@ class GeoSphere:
 
         for e in edge_list:
 
-            # For Domes ignore any edges below the Z plane
-            if ( C.Dome_calc == True ) and (( e.x1.z < 0 ) or ( e.x2.z < 0 )): 
+            # For Domes ignore any edges below the Z plane. Points on the
+            # plane can come out a few 1e-10 below it from the quantization
+            if ( C.Dome_calc == True ) and (( e.x1.z < -C.TINY ) or ( e.x2.z < -C.TINY )): 
                 #print "Ignoring edge " + e.name + " x1.z = " + str(e.x1.z) + " x2.z = " + str(e.x2.z)
                 continue # Continue with next 'e' in the FOR loop
 
 
-            # Otherwise add the edge
-            edge_found = False
+            # Otherwise add the edge, unless an equal edge is already in the
+            # temp list. Edges shared by two faces are loaded twice.
+            key = e.Get_Key()
 
-            # Keep them in a temp list to dedupe once all loaded
-            for x in self.Temp_Edge_List:
-                if e == x:
-                    edge_found = True
-                
-            if edge_found == False:
+            if key not in self.Temp_Edge_Keys:
+                self.Temp_Edge_Keys.add(key)
                 self.Temp_Edge_List.append(e)
 
 
@@ -126,13 +135,10 @@ class GeoSphere:
 
         for e in self.Updated_Edge_List:
 
-            found = False
-            
-            for ef in self.Edge_List:
-                if e == ef:
-                    found = True
+            key = e.Get_Key()
 
-            if found == False:
+            if key not in self.Edge_Keys:
+                self.Edge_Keys.add(key)
                 self.Edge_List.append(e)
 
             # Otherwise dont add it to the list
@@ -269,16 +275,44 @@ class GeoSphere:
                 self.Edge_Count[len] = 1  
                 #print "New Edge length: ", i
 
+    def Build_Half_Edges(self):
+        # Half-edge structure of the sphere, see HalfEdge.py. Its nodes are
+        # the point keys (Coordinates.Get_Key), numbered in Point_Hash order,
+        # so copies of a point in Point_Hash are one node. Its edges are
+        # numbered as in Edge_List.
+
+        # numpy is only loaded once the hubs are needed
+        import numpy as np
+        import HalfEdge as HE
+
+        self.Key_Node = dict()
+        for p in self.Point_Hash:
+            self.Key_Node.setdefault(p.Get_Key(), len(self.Key_Node))
+
+        edges = [(self.Key_Node[e.x1.Get_Key()], self.Key_Node[e.x2.Get_Key()]) for e in self.Edge_List]
+
+        triangles = list()
+        for face in self.FaceList:
+            for t in face.Triangles:
+                nodes = [self.Key_Node.get(p.Get_Key()) for p in t]
+                if None not in nodes:
+                    triangles.append(nodes)
+
+        self.Half_Edges = HE.HalfEdge(np.array(triangles, dtype=np.int64).reshape(-1, 3),
+                                      np.array(edges, dtype=np.int64).reshape(-1, 2), len(self.Key_Node))
+
     def Hub_List_From_Edges(self):
-        # For each point, scan the Edge_List and get all the associated edges
+        # For each point, add the edges which meet there, in order round it
+
+        self.Build_Half_Edges()
 
-        # This is still matching old points??? Hence getting double numbers?? Or duplicate edges not getting removed??
+        indptr, struts = self.Half_Edges.Vertex_Edges()
 
         for pt in self.Point_Hash.keys():
-            for e in self.Updated_Edge_List:
-                if e.x1 == pt or e.x2 == pt:
-                    # Add edge to the point list.
-                    pt.Add_Edge(e)
+            node = self.Key_Node[pt.Get_Key()]
+            for s in struts[indptr[node]:indptr[node + 1]]:
+                # Add edge to the point list.
+                pt.Add_Edge(self.Edge_List[s])
 
 
 
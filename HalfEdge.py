@@ -0,0 +1,227 @@
+# Half-edge structure of a triangle mesh
+#
+# Every triangle t = (a, b, c) gives the three half-edges 3t, 3t + 1 and
+# 3t + 2, running a -> b, b -> c and c -> a, so the face and next of a
+# half-edge are arithmetic and only the twins are searched for. All of it
+# is held in int64 arrays indexed by half-edge or node number:
+#
+#   Vertex[h]    node the half-edge starts at
+#   Next[h]      next half-edge round the same triangle
+#   Twin[h]      the half-edge running the other way along the same
+#                strut, -1 on a boundary (the cut of a dome)
+#   Face[h]      triangle of the half-edge
+#   Edge[h]      row of the strut in the edge array, -1 for a side of a
+#                triangle that is not in it
+#   Out[v]       a half-edge starting at node v, one on the boundary when v
+#                is on it, -1 for a node of no triangle
+#
+# The triangles must all be wound the same way round, as GeoMesh and
+# DomeGenerator make them (anticlockwise seen from outside). Struts used by
+# more than two triangles and sides missing from the edges get no twins.
+# Validate checks meshes on these arrays: a twin starting where its
+# half-edge starts is a strut run the same way by two triangles.
+#
+# GeoSphere answers its hub queries from these arrays as well.
+#
+# The queries walk every node or boundary loop at once, one numpy step per
+# strut of the largest hub or per node of the longest loop.
+
+import numpy as np
+
+import GeoMesh as GM
+
+
+class HalfEdge:
+
+    def __init__(self, triangles, edges, nV):
+        # Built in O(E log E) from the triangles and their edges
+
+        triangles = np.asarray(triangles).astype(np.int64, copy=False)
+        edges = np.asarray(edges).astype(np.int64, copy=False)
+
+        self.nV = nV
+        self.nE = len(edges)
+        self.nF = len(triangles)
+
+        h = np.arange(3 * self.nF)
+
+        self.Vertex = triangles.ravel()
+        self.Next = np.where(h % 3 == 2, h - 2, h + 1)
+        self.Face = h // 3
+        self.Edge = GM.Triangle_Sides(triangles, edges, nV, checked=True).ravel() if self.nF else h
+
+        # The two half-edges of a strut are next to each other once sorted
+        # by strut
+        order = np.argsort(self.Edge, kind='stable')
+        sorted_edge = self.Edge[order]
+
+        pair = (sorted_edge[1:] == sorted_edge[:-1]) & (sorted_edge[1:] >= 0)
+        pair &= self.Uses()[np.maximum(sorted_edge[1:], 0)] == 2
+        first, second = order[:-1][pair], order[1:][pair]
+
+        self.Twin = np.full(len(h), -1, dtype=np.int64)
+        self.Twin[first] = second
+        self.Twin[second] = first
+
+        # Boundary half-edges are written last so they win
+        self.Out = np.full(nV, -1, dtype=np.int64)
+        self.Out[self.Vertex] = h
+        boundary = np.nonzero(self.Twin < 0)[0]
+        self.Out[self.Vertex[boundary]] = boundary
+
+    def Uses(self):
+        # Number of triangles at every strut
+        return np.bincount(self.Edge[self.Edge >= 0], minlength=self.nE)
+
+    def Prev(self, h):
+        return np.where(h % 3 == 0, h + 2, h - 1)
+
+    def Swing(self, h):
+        # The next half-edge anticlockwise round the node h starts at, -1
+        # at the boundary
+        return self.Twin[self.Prev(h)]
+
+    def On_Boundary(self, vertices=None):
+        # Whether each node is on a boundary
+
+        if vertices is None:
+            vertices = np.arange(self.nV)
+
+        out = self.Out[vertices]
+        return (out >= 0) & (self.Twin[np.maximum(out, 0)] < 0)
+
+    def Vertex_Star(self, vertices=None):
+        # The half-edges starting at each node, anticlockwise from the
+        # boundary for nodes on it. CSR arrays: those of vertices[i] are
+        # half_edges[indptr[i]:indptr[i + 1]].
+
+        if vertices is None:
+            vertices = np.arange(self.nV)
+
+        start = self.Out[vertices]
+        h = start.copy()
+        active = h >= 0
+
+        steps = list()
+        while active.any():
+            steps.append(np.where(active, h, -1))
+            h = np.where(active, self.Swing(np.maximum(h, 0)), -1)
+            active &= (h >= 0) & (h != start)
+
+        if not steps:
+            return np.zeros(len(vertices) + 1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Node by node, each in walk order
+        walk = np.stack(steps, axis=1)
+        found = walk >= 0
+
+        indptr = np.zeros(len(vertices) + 1, dtype=np.int64)
+        np.cumsum(found.sum(axis=1), out=indptr[1:])
+
+        return indptr, walk[found]
+
+    def Vertex_Faces(self, vertices=None):
+        # Triangles round each node in anticlockwise order, CSR arrays
+
+        indptr, star = self.Vertex_Star(vertices)
+        return indptr, self.Face[star]
+
+    def Vertex_Ring(self, vertices=None):
+        # Neighbours of each node in anticlockwise order, CSR arrays. A node
+        # on the boundary has one more neighbour than triangles.
+
+        if vertices is None:
+            vertices = np.arange(self.nV)
+
+        indptr, star = self.Vertex_Star(vertices)
+        ring = self.Vertex[self.Next[star]]
+
+        # Close the fan of boundary nodes with the start of the last
+        # triangle's incoming half-edge
+        closed = self.On_Boundary(vertices) & (np.diff(indptr) > 0)
+        last = star[indptr[1:][closed] - 1]
+        ring = np.insert(ring, indptr[1:][closed], self.Vertex[self.Prev(last)])
+
+        indptr = indptr + np.concatenate([[0], np.cumsum(closed)])
+
+        return indptr, ring
+
+    def Vertex_Edges(self, vertices=None):
+        # Struts at each node in anticlockwise order, CSR arrays. A node on
+        # the boundary has one more strut than triangles, as in Vertex_Ring.
+        # Sides missing from the edges are left out.
+
+        if vertices is None:
+            vertices = np.arange(self.nV)
+
+        indptr, star = self.Vertex_Star(vertices)
+        struts = self.Edge[star]
+
+        closed = self.On_Boundary(vertices) & (np.diff(indptr) > 0)
+        last = star[indptr[1:][closed] - 1]
+        struts = np.insert(struts, indptr[1:][closed], self.Edge[self.Prev(last)])
+
+        indptr = indptr + np.concatenate([[0], np.cumsum(closed)])
+
+        # Drop the missing sides and close up the rows
+        present = struts >= 0
+        kept = np.concatenate([[0], np.cumsum(present)])
+
+        return kept[indptr], struts[present]
+
+    def Valence(self):
+        # Number of struts at every node that belong to a triangle
+        return np.diff(self.Vertex_Ring()[0])
+
+    def Edge_Faces(self):
+        # The two triangles sharing each strut, (E, 2), -1 where there are
+        # fewer. The triangle of the lower numbered half-edge comes first.
+
+        faces = np.full((self.nE, 2), -1, dtype=np.int64)
+
+        h = np.arange(len(self.Vertex))
+        first = (self.Twin < 0) | (h < self.Twin)
+
+        first &= self.Edge >= 0
+
+        faces[self.Edge[first], 0] = self.Face[first]
+        paired = first & (self.Twin >= 0)
+        faces[self.Edge[paired], 1] = self.Face[self.Twin[paired]]
+
+        return faces
+
+    def Boundary_Loops(self):
+        # Nodes of every boundary loop in order, a list of arrays. Each
+        # loop runs along its half-edges, with the mesh on its left.
+
+        boundary = np.nonzero(self.Twin < 0)[0]
+        if not len(boundary):
+            return list()
+
+        # Position in boundary of the boundary half-edge after each one
+        position = np.full(len(self.Vertex), -1, dtype=np.int64)
+        position[boundary] = np.arange(len(boundary))
+        after = position[self.Out[self.Vertex[self.Next[boundary]]]]
+
+        # Lowest position in each loop by pointer jumping, the loop starts
+        label = np.arange(len(boundary))
+        jump = after.copy()
+        for k in range(int(np.ceil(np.log2(len(boundary)))) + 1):
+            np.minimum(label, label[jump], out=label)
+            jump = jump[jump]
+
+        starts = np.nonzero(label == np.arange(len(boundary)))[0]
+
+        # Walk all loops together
+        p = starts.copy()
+        active = np.ones(len(starts), dtype=bool)
+        steps = list()
+        while active.any():
+            steps.append(np.where(active, p, -1))
+            p = after[p]
+            active &= p != starts
+
+        walk = np.stack(steps, axis=1)
+        nodes = np.where(walk >= 0, self.Vertex[boundary[np.maximum(walk, 0)]], -1)
+
+        return [row[row >= 0] for row in nodes]
@@ -103,14 +103,27 @@ class IcoFace:
 
         return ret_list
 
-    def Get_Edges_Equal_Distance(self):
+    def Get_Edges_Equal_Distance(self, min_z=None):
         # Based on equal division of the face into triangles - This leads to different sized strut lengths
         # If it was based on the equal division of the angle at the same radius then all strut lengths the same!!
         # What does this do to the structural integrity of the dome??
         # Return all the points/vertices of the face divided into equilateral triangles based on the frequency
+        #
+        # With min_z set (domes), small triangles that cannot give an edge
+        # with both points at or above min_z are skipped before any of their
+        # points are made. z is linear along each row, so a whole row pair
+        # is skipped when the ends of both rows are below.
+        #
+        # The small triangles are kept in self.Triangles as point triples,
+        # wound anticlockwise seen from outside the sphere: the upward ones
+        # are the (a, b, c) made below, the downward ones are found between
+        # them from the points of each lattice position (i, j).
 
         ret_list = list()
 
+        self.Triangles = list()
+        grid = dict()
+
         # Coordinates of the starting point
         x0 = self.x1.x
         y0 = self.x1.y
@@ -120,11 +133,25 @@ class IcoFace:
 
         delta_x1x3 = self.Get_Delta_Vector( self.x1, self.x3 )
 
+        nbrd = Decimal('1e-10')
+
+        def Up(i, j):
+            # Same z as Set_Cartesian gives the point (i, j)
+            return Decimal(z0 + i*delta_x1x2.z + j*delta_x1x3.z).quantize(nbrd) >= min_z
+
 
         for i in range(0,self.freq_n+1):
 
+            if min_z is not None:
+                n = self.freq_n
+                if not (Up(i, 0) or Up(i, n - i) or Up(i + 1, 0) or Up(i + 1, n - i - 1)):
+                    continue
+
             for j in range( 1, self.freq_n - i + 1):
 
+                if ( min_z is not None ) and ( Up(i, j) + Up(i, j-1) + Up(i+1, j-1) < 2 ):
+                    continue
+
 
                 # All marked as points?? Doesnt matter, vertices already stored!!
                 # Can remove any vertices from the list if we want, although all the same
@@ -148,7 +175,10 @@ class IcoFace:
 
                 c.Set_Cartesian( x0 + (i+1)*delta_x1x2.x + (j-1)*delta_x1x3.x, y0 + (i+1)*delta_x1x2.y + (j-1)*delta_x1x3.y, z0 + (i+1)*delta_x1x2.z + (j-1)*delta_x1x3.z)
 				
-				
+                grid.setdefault((i, j), a)
+                grid.setdefault((i, j-1), b)
+                grid.setdefault((i+1, j-1), c)
+                self.Triangles.append((a, b, c))
 
                 e1 = E.Edge("edge" + str(CF.nEdge) )
                 e1.Set_Edge_Number( CF.nEdge )
@@ -169,8 +199,30 @@ class IcoFace:
                 ret_list.append(e2)
                 ret_list.append(e3)
 
+        # Downward triangles (i, j), (i+1, j-1), (i+1, j), wound as the face.
+        # Skipped ones (domes) have fewer than 2 points up.
+        for i in range(0, self.freq_n):
+            for j in range(1, self.freq_n - i):
+                if (i, j) in grid and (i+1, j-1) in grid and (i+1, j) in grid:
+                    self.Triangles.append((grid[(i, j)], grid[(i+1, j-1)], grid[(i+1, j)]))
+
+        if not self.Outward():
+            self.Triangles = [(a, c, b) for a, b, c in self.Triangles]
+
         return ret_list
 
+    def Outward(self):
+        # Whether the corners go anticlockwise seen from outside the sphere,
+        # the normal (x2 - x1) x (x3 - x1) pointing away from the centre
+
+        u = (self.x2.x - self.x1.x, self.x2.y - self.x1.y, self.x2.z - self.x1.z)
+        v = (self.x3.x - self.x1.x, self.x3.y - self.x1.y, self.x3.z - self.x1.z)
+
+        normal = (u[1]*v[2] - u[2]*v[1], u[2]*v[0] - u[0]*v[2], u[0]*v[1] - u[1]*v[0])
+        centre = (self.x1.x + self.x2.x + self.x3.x, self.x1.y + self.x2.y + self.x3.y, self.x1.z + self.x2.z + self.x3.z)
+
+        return sum(n * c for n, c in zip(normal, centre)) > 0
+
     def Get_Vertex_Coord(self):
         # Return the coordinates of each of the vertices
         return 0
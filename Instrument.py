@@ -0,0 +1,184 @@
+# Instrumentation for the dome generation pipeline
+#
+# Wrap each step of the pipeline in a Stage() so its wall time is recorded.
+# When counting is enabled the hot methods of Coordinates and Edge are
+# wrapped as well, so the number of calls made in each stage can be printed
+# next to the V/E/F counts of the dome. Comparing a count against V shows
+# whether a stage is linear, quadratic or cubic from a single run.
+#
+# Peak memory per stage is also recorded while tracemalloc is tracing.
+
+import math as M
+import sys
+import time
+from decimal import Decimal
+
+import Coordinates as C
+import Edge as E
+import IcoFace as IF
+
+
+OPERATIONS = ( 'Edge.__eq__', 'Coordinates.__eq__', 'Decimal.quantize', 'Set_Cartesian', 'Set_Polar' )
+
+# Results per stage, in the order the stages were first entered
+Stage_Names = list()
+Stage_Times = dict()
+Stage_Counts = dict()
+Stage_Memory = dict()
+
+Counting = False
+
+_current_counts = dict()
+_originals = dict()
+
+
+def _Count(op):
+    _current_counts[op] = _current_counts.get(op, 0) + 1
+
+
+class _Counting_Decimal(Decimal):
+    # Decimal is a C type so quantize cannot be patched on the class itself.
+    # Modules that quantize get this subclass in place of Decimal instead.
+
+    def quantize(self, *args, **kwargs):
+        _Count('Decimal.quantize')
+        return Decimal.quantize(self, *args, **kwargs)
+
+
+def _Wrap(cls, attr, op):
+
+    original = getattr(cls, attr)
+    _originals[(cls, attr)] = original
+
+    def counted(*args, **kwargs):
+        _Count(op)
+        return original(*args, **kwargs)
+
+    setattr(cls, attr, counted)
+
+
+def Enable_Counters():
+    # Start counting calls to the hot methods. Safe to call more than once.
+    global Counting
+
+    if Counting:
+        return
+
+    _Wrap(E.Edge, '__eq__', 'Edge.__eq__')
+    _Wrap(C.Coordinates, '__eq__', 'Coordinates.__eq__')
+    _Wrap(C.Coordinates, 'Set_Cartesian', 'Set_Cartesian')
+    _Wrap(C.Coordinates, 'Set_Polar', 'Set_Polar')
+
+    C.Decimal = _Counting_Decimal
+    E.Decimal = _Counting_Decimal
+    IF.Decimal = _Counting_Decimal
+
+    Counting = True
+
+
+def Disable_Counters():
+    # Put the original methods back
+    global Counting
+
+    if not Counting:
+        return
+
+    for (cls, attr), original in _originals.items():
+        setattr(cls, attr, original)
+    _originals.clear()
+
+    C.Decimal = Decimal
+    E.Decimal = Decimal
+    IF.Decimal = Decimal
+
+    Counting = False
+
+
+def Reset():
+    # Forget all recorded stages, e.g. between two domes of a batch
+    del Stage_Names[:]
+    Stage_Times.clear()
+    Stage_Counts.clear()
+    Stage_Memory.clear()
+
+
+class Stage(object):
+    # Context manager marking one step of the pipeline
+    #
+    #   with I.Stage("faces"):
+    #       gs.Add_Face(a, b, c)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        global _current_counts
+
+        if self.name not in Stage_Times:
+            Stage_Names.append(self.name)
+            Stage_Times[self.name] = 0.0
+            Stage_Counts[self.name] = dict()
+            Stage_Memory[self.name] = 0
+
+        # Stages may nest, the inner stage gets the calls made inside it
+        self.outer_counts = _current_counts
+        _current_counts = Stage_Counts[self.name]
+
+        # Peak memory is measured from the start of the stage. The outer
+        # stage of a nested pair loses its peak when the inner one starts.
+        if _Tracing():
+            tm = sys.modules['tracemalloc']
+            self.start_memory = tm.get_traced_memory()[0]
+            tm.reset_peak()
+
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        global _current_counts
+
+        Stage_Times[self.name] += time.perf_counter() - self.start
+        _current_counts = self.outer_counts
+
+        if _Tracing():
+            peak = sys.modules['tracemalloc'].get_traced_memory()[1] - self.start_memory
+            Stage_Memory[self.name] = max(Stage_Memory[self.name], peak)
+
+        return False
+
+
+def _Tracing():
+    # tracemalloc is slow to import, it can only be tracing if the caller
+    # has imported it already
+    tm = sys.modules.get('tracemalloc')
+    return tm is not None and tm.is_tracing()
+
+
+def Get_Exponent(count, n):
+    # Effective exponent k such that count = n^k
+    if count <= 0 or n <= 1:
+        return 0.0
+    return M.log(count) / M.log(n)
+
+
+def Report(nV, nE, nF):
+    # Print the stage table next to the vertex/edge/face counts
+
+    print ("\nV = " + str(nV) + ", E = " + str(nE) + ", F = " + str(nF))
+
+    header = "{:<12} {:>10}".format("Stage", "Time (s)")
+    if Counting:
+        for op in OPERATIONS:
+            header += " {:>26}".format(op + " (V^k)")
+    print (header)
+
+    for name in Stage_Names:
+
+        line = "{:<12} {:>10.4f}".format(name, Stage_Times[name])
+
+        if Counting:
+            for op in OPERATIONS:
+                count = Stage_Counts[name].get(op, 0)
+                line += " {:>19} ({:>4.2f})".format(count, Get_Exponent(count, nV))
+
+        print (line)
@@ -0,0 +1,159 @@
+# Merging of near-coincident nodes
+#
+# Abaqus refuses to draw a line between points closer than 1e-6, and two
+# nodes that close are one hub in practice. The legacy engine can keep two
+# copies of a point a few 1e-11 apart (Point_Hash hashes the exact Decimal
+# values), so its meshes have such pairs, the lattice numbering of the fast
+# engine never makes them.
+#
+# The nodes are hashed into a grid of cubes at least the tolerance wide,
+# so every pair closer than it lies in the same or in neighbouring cubes.
+# The cube is also made about half the node spacing of a sphere of that
+# many nodes, which keeps a few nodes per cube, and the pairs are found in
+# O(N) expected time. Groups of nodes joined by close pairs are merged
+# into their lowest numbered node, then the struts that became a point,
+# struts doubled by the merge and triangles that lost a corner are
+# dropped.
+
+import itertools
+
+import numpy as np
+
+
+# Bits per axis of the grid cell keys, 3 x 21 fit in an int64
+CELL_BITS = 21
+
+# The offsets of a cell and its 26 neighbours
+OFFSETS = np.array(list(itertools.product((-1, 0, 1), repeat=3)), dtype=np.int64)
+
+
+def Close_Pairs(nodes, tolerance):
+    # All pairs (i, j), i < j, of nodes closer than tolerance, (P, 2)
+
+    nodes = np.asarray(nodes, dtype=np.float64)
+    nV = len(nodes)
+
+    if nV < 2 or tolerance <= 0:
+        return np.zeros((0, 2), dtype=np.int64)
+
+    low = nodes.min(axis=0)
+    extent = float((nodes.max(axis=0) - low).max())
+
+    cell = max(tolerance, extent / (2 * np.sqrt(nV)), extent / (1 << (CELL_BITS - 1)))
+    position = (nodes - low) / cell
+    cells = np.floor(position)
+
+    # Only nodes within tolerance of a side of their cell can be that close
+    # to a node of the next cell across it
+    near = tolerance / cell
+    lower = position - cells < near
+    upper = position - cells >= 1 - near
+
+    # Cells are numbered with room for the neighbour on every side
+    cells = cells.astype(np.int64) + 1
+    side = np.int64(1 << CELL_BITS)
+    keys = (cells[:, 0] * side + cells[:, 1]) * side + cells[:, 2]
+
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    candidates = list()
+
+    # Nodes in the same cell are next to each other once sorted
+    k = 1
+    while k < nV:
+        same = sorted_keys[k:] == sorted_keys[:-k]
+        if not same.any():
+            break
+        candidates.append(np.stack([order[:-k][same], order[k:][same]], axis=1))
+        k += 1
+
+    for offset in OFFSETS:
+        if not offset.any():
+            continue
+
+        need = np.ones(nV, dtype=bool)
+        for axis, d in enumerate(offset):
+            if d:
+                need &= lower[:, axis] if d < 0 else upper[:, axis]
+
+        i = np.nonzero(need)[0]
+        target = keys[i] + (offset[0] * side + offset[1]) * side + offset[2]
+        lo = np.searchsorted(sorted_keys, target, 'left')
+        hi = np.searchsorted(sorted_keys, target, 'right')
+
+        counts = hi - lo
+        j = order[np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - lo, counts)]
+        candidates.append(np.stack([np.repeat(i, counts), j], axis=1))
+
+    candidates = np.concatenate(candidates)
+    i = np.minimum(candidates[:, 0], candidates[:, 1])
+    j = np.maximum(candidates[:, 0], candidates[:, 1])
+
+    close = ((nodes[i] - nodes[j]) ** 2).sum(axis=1) < tolerance * tolerance
+    pairs = np.stack([i[close], j[close]], axis=1)
+
+    # A pair across a cell side is found from both of its nodes
+    return pairs[First_Rows(pairs)] if len(pairs) else pairs
+
+
+def Groups(pairs, nV):
+    # Lowest node of the group each node is joined to by the pairs
+
+    label = np.arange(nV)
+
+    while len(pairs):
+        before = label.copy()
+        np.minimum.at(label, pairs[:, 1], label[pairs[:, 0]])
+        np.minimum.at(label, pairs[:, 0], label[pairs[:, 1]])
+        label = label[label]
+        if np.array_equal(label, before):
+            break
+
+    return label
+
+
+def First_Rows(rows):
+    # Mask of the first of every set of equal rows of an (N, k) array
+
+    if not len(rows):
+        return np.zeros(0, dtype=bool)
+
+    order = np.lexsort(rows.T[::-1])
+    sorted_rows = rows[order]
+
+    first = np.zeros(len(rows), dtype=bool)
+    first[order[np.concatenate([[True], (sorted_rows[1:] != sorted_rows[:-1]).any(axis=1)])]] = True
+
+    return first
+
+
+def Merge_Nodes(nodes, edges, triangles, tolerance):
+    # Merge the nodes closer than tolerance. Returns the new nodes, edges
+    # and triangles, with the dtypes they came in, and the number of nodes
+    # merged away, edges dropped and triangles dropped.
+
+    nV = len(nodes)
+    label = Groups(Close_Pairs(nodes, tolerance), nV)
+
+    keep = label == np.arange(nV)
+    if keep.all():
+        return nodes, edges, triangles, (0, 0, 0)
+
+    new_number = (np.cumsum(keep) - 1)[label]
+
+    new_edges = new_number[edges]
+    low = np.minimum(new_edges[:, 0], new_edges[:, 1])
+    high = np.maximum(new_edges[:, 0], new_edges[:, 1])
+    keep_edge = (low != high) & First_Rows(np.stack([low, high], axis=1))
+
+    new_triangles = new_number[triangles]
+    a, b, c = new_triangles[:, 0], new_triangles[:, 1], new_triangles[:, 2]
+    keep_tri = (a != b) & (b != c) & (c != a)
+    keep_tri &= First_Rows(np.sort(new_triangles, axis=1))
+
+    nodes = np.compress(keep, nodes, axis=0)
+    edges = np.compress(keep_edge, new_edges, axis=0).astype(edges.dtype, copy=False)
+    triangles = np.compress(keep_tri, new_triangles, axis=0).astype(triangles.dtype, copy=False)
+
+    return nodes, edges, triangles, (nV - len(nodes), len(keep_edge) - len(edges), len(keep_tri) - len(triangles))
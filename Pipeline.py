@@ -0,0 +1,108 @@
+# Cached stages of DomeGenerator.Run_Dome
+#
+# Each stage is kept with the inputs it was made from, and is only made
+# again when one of them changes. The inputs of a stage include those of
+# the stages it is made from, so a change upstream redoes everything after
+# it:
+#
+#   build        engine, frequency, levels, dome, precision, symmetric
+#                                  the points on the flat icosahedron faces,
+#                                  GeoMesh or GeoSphere
+#   projection   + icosohedral, cylindrical, cut_point
+#   scale        + radius          the projected nodes are in proportion to
+#                                  the radius, so a new one only rescales
+#   merge        + merge_tolerance
+#   truncate     + truncation plane
+#
+# Renumbering, the checks and the output are always done. The cache lasts
+# one DomeGenerator run, so the domes of a batch file reuse each other.
+# With a directory, the projection is also saved there, for later runs
+# that only change the radius or the cut.
+
+import hashlib
+import os
+
+
+# Part of every key saved to disk, raise it when a stage changes its output
+CACHE_VERSION = 1
+
+
+class Cache:
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.entries = dict()
+        self.reused = list()
+        self.made = list()
+
+    def Begin(self):
+        # Start the report of a new run
+        self.reused = list()
+        self.made = list()
+
+    def Stage(self, name, inputs, make, save=None, load=None):
+        # The stage made from inputs, from the cache when it was made from
+        # the same inputs last time. save(path, value) and load(path) keep
+        # it in the cache directory as well.
+
+        entry = self.entries.get(name)
+        if entry is not None and entry[0] == inputs:
+            self.reused.append(name)
+            return entry[1]
+
+        path = None
+        if self.directory and save is not None:
+            key = hashlib.sha1(repr((CACHE_VERSION, name, inputs)).encode()).hexdigest()[:16]
+            path = os.path.join(self.directory, name + '-' + key + '.npz')
+
+        if path is not None and os.path.exists(path):
+            value = load(path)
+            self.reused.append(name + " (from " + self.directory + ")")
+        else:
+            value = make()
+            self.made.append(name)
+            if path is not None:
+                if not os.path.isdir(self.directory):
+                    os.makedirs(self.directory)
+                save(path, value)
+
+        self.entries[name] = (inputs, value)
+        return value
+
+    def Report(self):
+        # Line naming the stages reused and redone in this run, or None
+        # when nothing was reused
+
+        if not self.reused:
+            return None
+
+        return "Stages reused: " + ", ".join(self.reused) + "; redone: " + (", ".join(self.made) or "none")
+
+
+def Save_Levels(path, value):
+    # Save (radius, [(nodes, edges, triangles), ...])
+
+    import numpy as np
+
+    radius, levels = value
+    arrays = dict()
+    for k, (nodes, edges, triangles) in enumerate(levels):
+        arrays['nodes_' + str(k)] = nodes
+        arrays['edges_' + str(k)] = edges
+        arrays['triangles_' + str(k)] = triangles
+
+    np.savez(path, radius=radius, **arrays)
+
+
+def Load_Levels(path):
+
+    import numpy as np
+
+    with np.load(path) as saved:
+        levels = list()
+        k = 0
+        while 'nodes_' + str(k) in saved:
+            levels.append((saved['nodes_' + str(k)], saved['edges_' + str(k)], saved['triangles_' + str(k)]))
+            k += 1
+
+        return float(saved['radius']), levels
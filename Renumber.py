@@ -0,0 +1,330 @@
+# Node renumbering before export
+#
+# The node numbers of the legacy engine follow the iteration order of
+# GeoSphere.Point_Hash and those of the fast engine the icosahedron faces,
+# neither of which keeps neighbouring nodes close in number. Abaqus
+# assembles the stiffness matrix in node order, so its bandwidth (largest
+# difference between the numbers of the two ends of a strut) and profile
+# (sum over the rows of the distance to the lowest neighbour) set the cost
+# of the factorization.
+#
+# rcm  Reverse Cuthill-McKee: a breadth first walk of the edge graph from a
+#      pseudo-peripheral node, visiting the neighbours of each node in
+#      order of degree, then reversed. The walk is done one level at a
+#      time with numpy, which gives the same order as the node by node
+#      walk: every new node of a level is reached first from the earliest
+#      node of the level before.
+#
+# morton, hilbert
+#      Sort the nodes along a space filling curve through their coordinates,
+#      then the edges and triangles by their lowest node. Nodes close in
+#      space get close numbers and elements are stored near their nodes,
+#      which helps compression and every kernel gathering node coordinates.
+#      The Hilbert curve never jumps, the Morton (Z order) curve does, but
+#      its key is cheaper. Both are quantized to KEY_BITS per axis.
+
+import numpy as np
+
+
+METHODS = ('none', 'rcm', 'morton', 'hilbert')
+
+# Bits per axis of the space filling curve keys, 3 x 21 fit in a uint64
+KEY_BITS = 21
+
+# Nodes given Hilbert keys at a time
+HILBERT_CHUNK = 1 << 15
+
+
+def Adjacency(edges, nV):
+    # Neighbours of every node as CSR arrays: the neighbours of node i are
+    # indices[indptr[i]:indptr[i + 1]]
+
+    edges = edges.astype(np.int64, copy=False)
+
+    ends = np.concatenate([edges[:, 0], edges[:, 1]])
+    others = np.concatenate([edges[:, 1], edges[:, 0]])
+
+    order = np.argsort(ends, kind='stable')
+    indptr = np.zeros(nV + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ends, minlength=nV), out=indptr[1:])
+
+    return indptr, others[order]
+
+
+def Neighbours(indptr, indices, nodes):
+    # All neighbours of the given nodes, with the position in nodes of the
+    # node each was reached from
+
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+
+    offsets = np.cumsum(counts) - counts
+    position = np.arange(counts.sum()) - np.repeat(offsets - starts, counts)
+
+    return indices[position], np.repeat(np.arange(len(nodes)), counts)
+
+
+def First_Reached(reached, stamp):
+    # Mask of the first occurrence of every node in reached. stamp is any
+    # int64 array with a slot per node. Of repeated indices numpy assigns
+    # the last value, so writing the positions in reverse leaves the first.
+
+    position = np.arange(len(reached))
+    stamp[reached[::-1]] = position[::-1]
+
+    return stamp[reached] == position
+
+
+def Levels(indptr, indices, start):
+    # Breadth first levels of the component of start, as a list of arrays
+
+    visited = np.zeros(len(indptr) - 1, dtype=bool)
+    visited[start] = True
+    stamp = np.empty(len(indptr) - 1, dtype=np.int64)
+
+    levels = [np.array([start])]
+    while True:
+        reached = Neighbours(indptr, indices, levels[-1])[0]
+        reached = reached[~visited[reached]]
+        if not len(reached):
+            return levels
+        reached = reached[First_Reached(reached, stamp)]
+        visited[reached] = True
+        levels.append(reached)
+
+
+def Pseudo_Peripheral(indptr, indices, degree, start):
+    # A node far from the rest of its component (George and Liu): walk from
+    # the lowest degree node of the last level while that makes the
+    # component deeper
+
+    levels = Levels(indptr, indices, start)
+
+    while True:
+        last = levels[-1]
+        candidate = last[np.argmin(degree[last])]
+
+        deeper = Levels(indptr, indices, candidate)
+        if len(deeper) <= len(levels):
+            return start
+
+        start, levels = candidate, deeper
+
+
+def Cuthill_McKee(indptr, indices):
+    # Cuthill-McKee order of the nodes, component by component
+
+    nV = len(indptr) - 1
+    degree = np.diff(indptr)
+
+    visited = np.zeros(nV, dtype=bool)
+    stamp = np.empty(nV, dtype=np.int64)
+    order = list()
+
+    # Components are started from their lowest degree node, lowest first
+    by_degree = np.argsort(degree, kind='stable')
+    k = 0
+
+    while k < nV:
+        if visited[by_degree[k]]:
+            k += 1
+            continue
+
+        start = Pseudo_Peripheral(indptr, indices, degree, by_degree[k])
+        visited[start] = True
+        level = np.array([start])
+
+        while len(level):
+            order.append(level)
+
+            reached, parent = Neighbours(indptr, indices, level)
+            new = ~visited[reached]
+            reached, parent = reached[new], parent[new]
+
+            # Earliest parent first, then lowest degree, then lowest number,
+            # and each node only where it is reached first
+            reached = reached[np.lexsort((reached, degree[reached], parent))]
+            level = reached[First_Reached(reached, stamp)]
+
+            visited[level] = True
+
+    return np.concatenate(order) if order else np.zeros(0, dtype=np.int64)
+
+
+def Reverse_Cuthill_McKee(edges, nV):
+    # Node order that keeps the bandwidth of the edge graph small: order[k]
+    # is the old number of the node numbered k
+
+    indptr, indices = Adjacency(edges, nV)
+
+    return Cuthill_McKee(indptr, indices)[::-1]
+
+
+def Quantize(nodes, bits=KEY_BITS):
+    # Coordinates as integers 0 .. 2^bits - 1 over the bounding box, the
+    # same scale on every axis. Returns three uint64 arrays.
+
+    nodes = nodes.astype(np.float64, copy=False)
+
+    low = nodes.min(axis=0)
+    extent = (nodes.max(axis=0) - low).max()
+    scale = ((1 << bits) - 1) / extent if extent > 0 else 0.0
+
+    q = np.rint((nodes - low) * scale).astype(np.uint64)
+
+    return q[:, 0], q[:, 1], q[:, 2]
+
+
+def Spread_Bits(v):
+    # Put the low 21 bits of v three places apart: bit k moves to bit 3k
+
+    v = v & np.uint64(0x1fffff)
+    v = (v | v << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+    v = (v | v << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+    v = (v | v << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+    v = (v | v << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+    v = (v | v << np.uint64(2)) & np.uint64(0x1249249249249249)
+
+    return v
+
+
+def Morton_Keys(nodes, bits=KEY_BITS):
+    # Z order key of every node, the bits of x, y and z interleaved
+
+    x, y, z = Quantize(nodes, bits)
+
+    return Spread_Bits(x) | Spread_Bits(y) << np.uint64(1) | Spread_Bits(z) << np.uint64(2)
+
+
+def Hilbert_Index(x, y, z, bits=KEY_BITS):
+    # Hilbert curve key of integer points. The axes are turned into the
+    # transposed Hilbert index with Skilling's method ("Programming the
+    # Hilbert curve", 2004), one bit plane at a time for all points, and
+    # the bits are then interleaved like a Morton key.
+
+    X = [x.copy(), y.copy(), z.copy()]
+    n = len(X)
+
+    one = np.uint64(1)
+    mask = np.empty_like(X[0])
+    t = np.empty_like(X[0])
+
+    # Undo the excess work of the inverse. mask is all ones where bit k of
+    # X[i] is set, so the branches of the method become masked xors.
+    for k in range(bits - 1, 0, -1):
+        P = np.uint64((1 << k) - 1)
+        for i in range(n):
+            np.right_shift(X[i], np.uint64(k), out=mask)
+            np.bitwise_and(mask, one, out=mask)
+            np.negative(mask, out=mask)
+
+            np.bitwise_xor(X[0], P & mask, out=X[0])
+
+            np.bitwise_xor(X[0], X[i], out=t)
+            np.bitwise_and(t, P & ~mask, out=t)
+            np.bitwise_xor(X[0], t, out=X[0])
+            if i:
+                np.bitwise_xor(X[i], t, out=X[i])
+
+    # Gray encode
+    for i in range(1, n):
+        np.bitwise_xor(X[i], X[i - 1], out=X[i])
+
+    t[:] = 0
+    for k in range(bits - 1, 0, -1):
+        np.right_shift(X[n - 1], np.uint64(k), out=mask)
+        np.bitwise_and(mask, one, out=mask)
+        np.negative(mask, out=mask)
+        np.bitwise_xor(t, np.uint64((1 << k) - 1) & mask, out=t)
+
+    for i in range(n):
+        np.bitwise_xor(X[i], t, out=X[i])
+
+    return Spread_Bits(X[0]) << np.uint64(2) | Spread_Bits(X[1]) << np.uint64(1) | Spread_Bits(X[2])
+
+
+def Hilbert_Keys(nodes, bits=KEY_BITS):
+    # Hilbert curve key of every node, HILBERT_CHUNK nodes at a time so the
+    # bit planes stay in cache
+
+    x, y, z = Quantize(nodes, bits)
+    keys = np.empty(len(x), dtype=np.uint64)
+
+    for start in range(0, len(x), HILBERT_CHUNK):
+        part = slice(start, start + HILBERT_CHUNK)
+        keys[part] = Hilbert_Index(x[part], y[part], z[part], bits)
+
+    return keys
+
+
+def Bandwidth(edges, nV):
+    # Bandwidth and profile of the node numbering of an edge list
+
+    if not len(edges):
+        return 0, 0
+
+    edges = edges.astype(np.int64, copy=False)
+    low = np.minimum(edges[:, 0], edges[:, 1])
+    high = np.maximum(edges[:, 0], edges[:, 1])
+
+    first = np.arange(nV)
+    np.minimum.at(first, high, low)
+
+    return int((high - low).max()), int((np.arange(nV) - first).sum())
+
+
+def Permute(nodes, edges, triangles, order):
+    # Renumber the mesh so that old node order[k] becomes node k. Edges and
+    # triangles keep their order and the dtype of their node numbers.
+
+    new_number = np.empty(len(order), dtype=np.int64)
+    new_number[order] = np.arange(len(order))
+
+    nodes = np.take(nodes, order, axis=0)
+    edges = new_number[edges].astype(edges.dtype, copy=False)
+    triangles = new_number[triangles].astype(triangles.dtype, copy=False)
+
+    return nodes, edges, triangles
+
+
+def Sort_Elements(edges, triangles):
+    # Edges and triangles in order of their lowest node. The nodes of each
+    # keep their order, so triangles keep their winding.
+
+    edges = np.take(edges, np.argsort(edges.min(axis=1), kind='stable'), axis=0)
+    triangles = np.take(triangles, np.argsort(triangles.min(axis=1), kind='stable'), axis=0)
+
+    return edges, triangles
+
+
+def Renumber(method, nodes, edges, triangles):
+    # Renumber the mesh with one of METHODS and print the bandwidth and
+    # profile before and after. Returns the new nodes, edges and triangles.
+
+    if method not in METHODS:
+        raise ValueError("Unknown renumbering '" + method + "', use one of " + ", ".join(METHODS))
+
+    if method == 'none':
+        return nodes, edges, triangles
+
+    nV = len(nodes)
+    before = Bandwidth(edges, nV)
+
+    if method == 'rcm':
+        order = Reverse_Cuthill_McKee(edges, nV)
+    elif method == 'morton':
+        order = np.argsort(Morton_Keys(nodes), kind='stable')
+    else:
+        order = np.argsort(Hilbert_Keys(nodes), kind='stable')
+
+    nodes, edges, triangles = Permute(nodes, edges, triangles, order)
+
+    if method != 'rcm':
+        edges, triangles = Sort_Elements(edges, triangles)
+
+    after = Bandwidth(edges, nV)
+
+    print("Renumbered (" + method + "): bandwidth " + str(before[0]) + " -> " + str(after[0])
+          + ", profile " + str(before[1]) + " -> " + str(after[1]))
+
+    return nodes, edges, triangles
@@ -0,0 +1,304 @@
+#! /usr/bin/env python
+# -*- python -*-
+
+# ----------------------------------------------------------------
+# Strut and hub tables for fabrication, without building the dome
+#
+# Strut lengths only differ between edges that no symmetry of the dome
+# maps onto each other. The full sphere (sphere or icosohedral nodes) has
+# the 60 rotations of the icosahedron, so the struts of one face times 20
+# cover it. Domes and cylinders only keep the 5 rotations about the Z axis,
+# so one face of each of the 4 face orbits times 5 is used instead (see
+# Symmetry.Axis_Sector). Struts along an icosahedron edge are shared by two
+# faces and count half in each. For domes only the struts with both ends on
+# or above the Z plane are counted, as in GeoMesh.Subdivide_Dome. The
+# struts at the bottom vertex of a cylindrical sphere are counted one by
+# one, its projection is not symmetric.
+#
+# Hubs of the full sphere are 12 with 5 struts and 10n^2 - 10 with 6. For
+# domes the struts at every node are counted on the lattice numbers of the
+# faces above the plane, no coordinates are made.
+#
+#   python Strut_Table.py --frequency 4 --radius 2
+#   python Strut_Table.py --frequencies 1 2 3 4 5 6 --check
+#
+# --check also builds the dome with GeoMesh and compares the tables, the
+# exit status is 1 when any differs. For the full sphere it also checks the
+# tables against the orbits of the 60 rotations (Symmetry.Edge_Orbits and
+# Node_Orbits): the struts of every orbit have one length and the hubs of
+# every node orbit one number of struts, and the orbits give the same
+# strut table.
+# ----------------------------------------------------------------
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import config as CF
+import GeoMesh as GM
+import Symmetry as S
+
+
+# Struts closer in length than this (relative to the radius) are one class
+TOLERANCE = 1e-9
+
+
+# Symmetry.Axis_Sector, found on first use. It does not depend on the radius.
+_axis_sector = None
+
+
+def Sector(dome_calc, cylindrical):
+    # Faces to work on and the number of rotated copies of them
+
+    global _axis_sector
+
+    if not dome_calc and not cylindrical:
+        return np.array([S.REFERENCE_FACE]), 20
+
+    if _axis_sector is None:
+        _axis_sector = S.Axis_Sector(GM.Icosahedron_Vertices(1.0))
+
+    return _axis_sector, 5
+
+
+def Face_Edges(freq):
+    # The edges of one face lattice as pairs of lattice positions, and
+    # whether each lies along an icosahedron edge
+
+    i, j = GM.Lattice(freq)
+    W = np.stack([freq - i - j, i, j], axis=1)
+
+    # Every edge is a side of exactly one of the freq(freq+1)/2 upward
+    # small triangles (i, j), (i+1, j), (i, j+1)
+    up = (i + j) <= freq - 1
+    a = GM.Lattice_Index(freq, i[up], j[up])
+    b = GM.Lattice_Index(freq, i[up] + 1, j[up])
+    c = GM.Lattice_Index(freq, i[up], j[up] + 1)
+    pairs = np.concatenate([np.stack([a, b], axis=1), np.stack([a, c], axis=1), np.stack([b, c], axis=1)])
+
+    along = ((W[pairs[:, 0]] == 0) & (W[pairs[:, 1]] == 0)).any(axis=1)
+
+    return W, pairs, along
+
+
+def Classes(lengths, counts, rad):
+    # Merge lengths within TOLERANCE into one class, returns a list of
+    # (length, count) in order of length
+
+    order = np.argsort(lengths)
+    lengths = lengths[order]
+    counts = counts[order]
+
+    start = np.concatenate([[True], np.diff(lengths) > TOLERANCE * rad])
+    group = np.cumsum(start) - 1
+
+    total = np.bincount(group, weights=counts)
+    first = lengths[start]
+
+    return [(float(l), int(round(c))) for l, c in zip(first, total) if round(c) > 0]
+
+
+def Project_Faces(faces, W, freq, rad, icosohedral, cylindrical, cut_point):
+    # Flat and projected lattice points of the faces, (faces, points, 3)
+    # each, projected like the full build
+
+    vertices = GM.Icosahedron_Vertices(rad)
+    flat = np.einsum('pk,fkd->fpd', W / float(freq), vertices[GM.ICOSA_FACES[faces]])
+
+    mesh = GM.GeoMesh("Sector", freq, rad)
+    mesh.Flat_Nodes = flat.reshape(-1, 3)
+    mesh.Project(icosohedral, cylindrical, cut_point)
+
+    return flat, mesh.Nodes.reshape(flat.shape)
+
+
+def Strut_Table(freq, rad, dome_calc, icosohedral, cylindrical, cut_point):
+    # Strut length classes with their counts, [(length, count), ...]
+
+    faces, copies = Sector(dome_calc, cylindrical)
+
+    W, pairs, along = Face_Edges(freq)
+    weight = np.where(along, 0.5, 1.0)
+
+    flat, points = Project_Faces(faces, W, freq, rad, icosohedral, cylindrical, cut_point)
+
+    lengths = np.linalg.norm(points[:, pairs[:, 0]] - points[:, pairs[:, 1]], axis=2)
+    counts = np.broadcast_to(weight * copies, lengths.shape).copy()
+
+    if dome_calc:
+        up = flat[:, :, 2] >= -GM.TINY * rad
+        counts[~(up[:, pairs[:, 0]] & up[:, pairs[:, 1]])] = 0
+
+    if cylindrical and not dome_calc:
+        # The cylinder puts l, the only node on the axis below the cut, at
+        # (R, 0, z) as cart2cyl does, so the struts at it are not symmetric.
+        # They are counted once each on the 5 faces around l instead.
+        L = 11
+        corner = np.argmax(W, axis=1)
+        at_l = (W.max(axis=1) == freq)[None, :] & (GM.ICOSA_FACES[faces][:, corner] == L)
+        counts[at_l[:, pairs[:, 0]] | at_l[:, pairs[:, 1]]] = 0
+
+        around = np.nonzero((GM.ICOSA_FACES == L).any(axis=1))[0]
+        points_l = Project_Faces(around, W, freq, rad, icosohedral, cylindrical, cut_point)[1]
+        at_l = (W.max(axis=1) == freq)[None, :] & (GM.ICOSA_FACES[around][:, corner] == L)
+        struts_l = at_l[:, pairs[:, 0]] | at_l[:, pairs[:, 1]]
+
+        lengths_l = np.linalg.norm(points_l[:, pairs[:, 0]] - points_l[:, pairs[:, 1]], axis=2)
+
+        # Struts at a corner lie along icosahedron edges, half in each face
+        lengths = np.concatenate([lengths.ravel(), lengths_l[struts_l]])
+        counts = np.concatenate([counts.ravel(), np.full(int(struts_l.sum()), 0.5)])
+
+    return Classes(lengths.ravel(), counts.ravel(), rad)
+
+
+def Hub_Table(freq, dome_calc):
+    # Number of hubs with each number of struts, [(struts, count), ...]
+
+    if not dome_calc:
+        table = [(5, 12), (6, 10 * freq * freq - 10)]
+        return [h for h in table if h[1] > 0]
+
+    # Corner heights do not depend on the radius
+    vertices = GM.Icosahedron_Vertices(1.0)
+    min_z = -GM.TINY
+
+    W, pairs, along = Face_Edges(freq)
+    weight = np.where(along, 0.5, 1.0)
+
+    corner_z = vertices[GM.ICOSA_FACES, 2]
+    faces = np.nonzero(corner_z.max(axis=1) >= min_z)[0]
+
+    ids = GM.Lattice_Node_Numbers(freq, GM.ICOSA_FACES[faces], faces)
+    up = ((W / float(freq)) @ corner_z[faces].T).T >= min_z
+
+    kept = up[:, pairs[:, 0]] & up[:, pairs[:, 1]]
+    ends = np.concatenate([ids[:, pairs[:, 0]][kept], ids[:, pairs[:, 1]][kept]])
+    ends_weight = np.concatenate([np.broadcast_to(weight, kept.shape)[kept]] * 2)
+
+    valence = np.rint(np.bincount(ends, weights=ends_weight)).astype(np.int64)
+    valence = valence[valence > 0]
+
+    struts, count = np.unique(valence, return_counts=True)
+
+    return [(int(s), int(c)) for s, c in zip(struts, count)]
+
+
+def Full_Build_Tables(mesh, rad):
+    # The same tables from the whole mesh, for checking
+
+    lengths = np.linalg.norm(mesh.Nodes[mesh.Edges[:, 0]] - mesh.Nodes[mesh.Edges[:, 1]], axis=1)
+    struts = Classes(lengths, np.ones(len(lengths)), rad)
+
+    # Struts at each hub walked round its triangles
+    valence = mesh.Half_Edges().Valence()
+    hub_struts, hub_count = np.unique(valence, return_counts=True)
+    hubs = [(int(s), int(c)) for s, c in zip(hub_struts, hub_count)]
+
+    return struts, hubs
+
+
+def Orbit_Table(mesh, freq, rad):
+    # Strut table of the whole sphere from its edge orbits, one length per
+    # orbit, and whether every edge orbit has one length and every node
+    # orbit one number of struts
+
+    corner_orders = S.Face_Maps(GM.Icosahedron_Vertices(1.0))[1]
+
+    lengths = np.linalg.norm(mesh.Nodes[mesh.Edges[:, 0]] - mesh.Nodes[mesh.Edges[:, 1]], axis=1)
+    orbit = S.Edge_Orbits(freq, corner_orders, mesh.Edges)
+
+    shortest = np.full(orbit.max() + 1, np.inf)
+    longest = np.zeros(orbit.max() + 1)
+    np.minimum.at(shortest, orbit, lengths)
+    np.maximum.at(longest, orbit, lengths)
+
+    valence = mesh.Half_Edges().Valence()
+    node_orbit = S.Node_Orbits(freq, corner_orders)
+
+    fewest = np.full(node_orbit.max() + 1, valence.max())
+    most = np.zeros(node_orbit.max() + 1, dtype=valence.dtype)
+    np.minimum.at(fewest, node_orbit, valence)
+    np.maximum.at(most, node_orbit, valence)
+
+    alike = bool((longest - shortest <= TOLERANCE * rad).all() and (fewest == most).all())
+
+    return Classes(shortest, np.bincount(orbit).astype(np.float64), rad), alike
+
+
+def Same_Struts(a, b, rad):
+
+    if len(a) != len(b):
+        return False
+
+    return all(abs(la - lb) <= TOLERANCE * rad * 10 and ca == cb for (la, ca), (lb, cb) in zip(a, b))
+
+
+def Print_Tables(struts, hubs, rad):
+
+    print ("{:>6} {:>14} {:>12} {:>7}".format("Strut", "Length", "Chord factor", "Count"))
+    for k, (length, count) in enumerate(struts):
+        print ("{:>6} {:>14.9f} {:>12.9f} {:>7}".format(k + 1, length, length / rad, count))
+    print ("{:>6} {:>14} {:>12} {:>7}".format("", "", "Total", sum(c for l, c in struts)))
+
+    print ("")
+    print ("{:>6} {:>7}".format("Struts", "Hubs"))
+    for struts_at_hub, count in hubs:
+        print ("{:>6} {:>7}".format(struts_at_hub, count))
+    print ("{:>6} {:>7}".format("Total", sum(c for s, c in hubs)))
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Strut and hub tables of a geodesic dome, without building it.")
+    parser.add_argument('--frequency', '--frequencies', dest='frequencies', type=int, nargs='+', default=[CF.frequency_n])
+    parser.add_argument('--radius', type=float, default=CF.R_mm)
+    parser.add_argument('--dome', action=argparse.BooleanOptionalAction, default=CF.Dome_calc)
+    parser.add_argument('--icosohedral', action=argparse.BooleanOptionalAction, default=CF.Icosohedral)
+    parser.add_argument('--cylindrical', action=argparse.BooleanOptionalAction, default=CF.Cylindrical)
+    parser.add_argument('--cut-point', type=float, default=CF.Cut_Point)
+    parser.add_argument('--check', action='store_true', help="also build the whole mesh and compare")
+    args = parser.parse_args(argv)
+
+    failures = 0
+
+    for freq in args.frequencies:
+
+        case = (freq, args.radius, args.dome, args.icosohedral, args.cylindrical, args.cut_point)
+
+        start = time.perf_counter()
+        struts = Strut_Table(*case)
+        hubs = Hub_Table(freq, args.dome)
+        elapsed = time.perf_counter() - start
+
+        print ("\nFrequency {}, {:.1f} us".format(freq, elapsed * 1e6))
+        Print_Tables(struts, hubs, args.radius)
+
+        if args.check:
+            mesh = GM.Build(*case)
+
+            full_struts, full_hubs = Full_Build_Tables(mesh, args.radius)
+            ok = Same_Struts(struts, full_struts, args.radius) and hubs == full_hubs
+            print ("Check against the full build: " + ("ok" if ok else "DIFFERS"))
+            if not ok:
+                failures += 1
+
+            # Only the full sphere has all 60 rotations
+            if not args.dome and not args.cylindrical:
+                orbit_struts, alike = Orbit_Table(mesh, freq, args.radius)
+                ok = alike and Same_Struts(struts, orbit_struts, args.radius)
+                print ("Check against the symmetry orbits: " + ("ok" if ok else "DIFFERS"))
+                if not ok:
+                    failures += 1
+
+    if failures:
+        print ("\nFAILED: {} table(s) differ from the full build".format(failures))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+# Icosahedral symmetry of the geodesic sphere
+#
+# The 60 rotations of the icosahedral group map the icosahedron of
+# GeoMesh.Icosahedron_Vertices onto itself. Face 0 (a, b, c) is used as the
+# reference face: every other face is the image of it under 3 of the
+# rotations, so one subdivided face is enough to place the points of all
+# 20 (GeoMesh.GeoMesh.Subdivide with symmetric set).
+#
+# A lattice point of a face is given by its weights (w0, w1, w2) on the
+# corners, w0 + w1 + w2 = freq. Taken in reference corner order, the points
+# of one orbit of the group are exactly the weights related by
+#
+#   a cyclic shift             (the rotations keeping the face in place)
+#   any permutation            when a weight is 0, the point is on an
+#                              icosahedron edge and the half turn about
+#                              that edge swaps the two faces
+#
+# so the orbit of every node and edge of the sphere is found from its
+# weights alone, without comparing coordinates.
+
+import itertools
+
+import numpy as np
+
+import GeoMesh as GM
+
+
+REFERENCE_FACE = 0
+
+CYCLIC = ((0, 1, 2), (1, 2, 0), (2, 0, 1))
+PERMUTATIONS = tuple(itertools.permutations(range(3)))
+
+
+def Rotations(vertices):
+    # The 60 rotations of the group as a (60, 3, 3) stack, with the (60, 12)
+    # vertex permutations they make: R @ vertices[k] = vertices[perm[k]].
+    # Each rotation is the one taking the reference face corners onto the
+    # corners of a face in some order.
+
+    ref = vertices[GM.ICOSA_FACES[REFERENCE_FACE]]
+    ref_inverse = np.linalg.inv(ref.T)
+
+    rotations = list()
+    for face in GM.ICOSA_FACES:
+        for order in PERMUTATIONS:
+            R = vertices[face[list(order)]].T @ ref_inverse
+            if np.allclose(R @ R.T, np.eye(3)) and np.linalg.det(R) > 0:
+                rotations.append(R)
+
+    rotations = np.array(rotations)
+
+    # Image of every vertex, matched to the nearest vertex
+    moved = np.einsum('rij,kj->rki', rotations, vertices)
+    distance = np.linalg.norm(moved[:, :, None, :] - vertices[None, None, :, :], axis=3)
+    perm = np.argmin(distance, axis=2)
+
+    return rotations, perm
+
+
+def Face_Maps(vertices):
+    # For every face, the rotation taking the reference face onto it and the
+    # corner order it does that in: R @ ref corner k = face corner order[k].
+    # Returns the (20, 3, 3) rotations and the (20, 3) corner orders.
+
+    rotations, perm = Rotations(vertices)
+    ref = GM.ICOSA_FACES[REFERENCE_FACE]
+
+    face_rotations = np.empty((len(GM.ICOSA_FACES), 3, 3))
+    corner_orders = np.empty((len(GM.ICOSA_FACES), 3), dtype=np.int64)
+
+    for f, face in enumerate(GM.ICOSA_FACES):
+        for r in range(len(rotations)):
+            image = perm[r, ref]
+            if set(image.tolist()) == set(face.tolist()):
+                face_rotations[f] = rotations[r]
+                corner_orders[f] = [face.tolist().index(v) for v in image.tolist()]
+                break
+
+    return face_rotations, corner_orders
+
+
+def Axis_Sector(vertices):
+    # One face from each orbit of the 5 rotations about the axis through a
+    # and l (the Z axis), for shapes that only have that symmetry: domes and
+    # cylinders. Returns the faces, which the 5 rotations map onto all 20.
+
+    rotations, perm = Rotations(vertices)
+    about_axis = perm[:, 0] == 0
+
+    face_keys = [frozenset(f.tolist()) for f in GM.ICOSA_FACES]
+
+    sector = list()
+    seen = set()
+    for f, face in enumerate(GM.ICOSA_FACES):
+        if f in seen:
+            continue
+        sector.append(f)
+        for r in np.nonzero(about_axis)[0]:
+            seen.add(face_keys.index(frozenset(perm[r, face].tolist())))
+
+    return np.array(sector)
+
+
+def Lattice_Targets(freq, corner_orders):
+    # Position in the lattice of face f of point k of the reference face
+    # lattice, shape (20, points per face). Reference corner k goes to
+    # corner corner_orders[f, k] of face f and takes its weight with it.
+
+    i, j = GM.Lattice(freq)
+    W = np.stack([freq - i - j, i, j], axis=1)
+
+    W_face = np.empty((len(corner_orders),) + W.shape, dtype=W.dtype)
+    np.put_along_axis(W_face, np.broadcast_to(corner_orders[:, None, :], W_face.shape), W[None], axis=2)
+
+    return GM.Lattice_Index(freq, W_face[:, :, 1], W_face[:, :, 2])
+
+
+def Reference_Weights(freq, corner_orders):
+    # Weights of every lattice point of every face on the corners of that
+    # face, taken in reference corner order. Shape (20, points per face, 3).
+
+    i, j = GM.Lattice(freq)
+    W = np.stack([freq - i - j, i, j], axis=1)
+
+    return W[:, corner_orders].transpose(1, 0, 2)
+
+
+def Weight_Codes(W, freq, permutations):
+    # Smallest code of the weights (..., 3) over the given corner
+    # permutations, one integer per point
+
+    base = freq + 1
+    codes = [(W[..., p[0]] * base + W[..., p[1]]) * base + W[..., p[2]] for p in permutations]
+
+    return np.min(codes, axis=0)
+
+
+def Node_Orbits(freq, corner_orders):
+    # Orbit number of every node of the whole sphere, shape (V,), numbered
+    # in order of the smallest weight code of the orbit
+
+    W = Reference_Weights(freq, corner_orders)
+    ids = GM.Lattice_Node_Numbers(freq, GM.ICOSA_FACES)
+
+    on_edge = (W == 0).any(axis=2)
+    codes = np.where(on_edge, Weight_Codes(W, freq, PERMUTATIONS), Weight_Codes(W, freq, CYCLIC))
+
+    node_codes = np.empty(GM.Sphere_Counts(freq)[0], dtype=np.int64)
+    node_codes[ids.ravel()] = codes.ravel()
+
+    return np.unique(node_codes, return_inverse=True)[1]
+
+
+def Edge_Orbits(freq, corner_orders, edges):
+    # Orbit number of every edge (E, 2) of the whole sphere, numbered in
+    # order of the smallest code of the orbit. Both ends of an edge are
+    # moved by the same corner permutation, edges along an icosahedron edge
+    # take all six and edges inside a face the three cyclic ones.
+
+    W = Reference_Weights(freq, corner_orders)
+    ids = GM.Lattice_Node_Numbers(freq, GM.ICOSA_FACES)
+    tri = GM.Lattice_Triangles(freq)
+
+    # Every edge of every face in face lattice positions
+    pairs = tri[:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+    pairs = np.unique(np.sort(pairs, axis=1), axis=0)
+
+    P = W[:, pairs[:, 0]]
+    Q = W[:, pairs[:, 1]]
+    along = ((P == 0) & (Q == 0)).any(axis=2)
+
+    base = (freq + 1) ** 3
+
+    def pair_codes(permutations):
+        codes = list()
+        for p in permutations:
+            cp = Weight_Codes(P[..., p], freq, [(0, 1, 2)])
+            cq = Weight_Codes(Q[..., p], freq, [(0, 1, 2)])
+            codes.append(np.minimum(cp, cq) * base + np.maximum(cp, cq))
+        return np.min(codes, axis=0)
+
+    codes = np.where(along, pair_codes(PERMUTATIONS), pair_codes(CYCLIC))
+
+    # Look the codes up by the global node numbers of the edge
+    nV = GM.Sphere_Counts(freq)[0]
+    u = ids[:, pairs[:, 0]]
+    v = ids[:, pairs[:, 1]]
+    keys = np.minimum(u, v) * nV + np.maximum(u, v)
+
+    keys, first = np.unique(keys.ravel(), return_index=True)
+    codes = codes.ravel()[first]
+
+    wanted = np.minimum(edges[:, 0], edges[:, 1]).astype(np.int64) * nV + np.maximum(edges[:, 0], edges[:, 1])
+    edge_codes = codes[np.searchsorted(keys, wanted)]
+
+    return np.unique(edge_codes, return_inverse=True)[1]
@@ -0,0 +1,133 @@
+# Truncation of the sphere at any plane
+#
+# Dome_calc keeps the edges with both ends on or above z = 0, which leaves a
+# ragged base whenever a ring of nodes does not lie on the plane. Clip cuts
+# the mesh at the plane instead: struts crossing it end at a new node on
+# the plane, triangles crossing it keep the part above, split in two where
+# that is four sided, and the base is a level ring of nodes on the plane.
+#
+# The plane is n . x = offset with the part on the side n points to kept,
+# or for the usual dome sizes a height fraction: a 3/8 dome is 3/8 of the
+# sphere diameter high, its plane is z = R (1 - 2 * 3/8).
+#
+# Nodes closer to the plane than SNAP times the shortest strut are moved
+# onto it. Every other node is at least that far from the plane, and so at
+# least that far along any strut from where the strut crosses it, so no
+# piece of a cut strut is shorter than SNAP times the shortest strut. That
+# only keeps crossings off the nodes, the triangles cut at a shallow angle
+# can still be thin. The crossing of
+# strut k is node V + k, so no crossing is made twice, and the struts of
+# the cut mesh are the sides of its triangles. The struts of the triangles
+# crossing the plane and the base ring of the cut mesh are read from their
+# half-edges (HalfEdge.py).
+
+import numpy as np
+
+import GeoMesh as GM
+import HalfEdge as HE
+
+
+# Nodes closer to the plane than this, relative to the shortest strut,
+# are moved onto it
+SNAP = 1e-3
+
+
+def Height_Plane(fraction, rad):
+    # Normal and offset of the plane leaving a dome fraction of the sphere
+    # diameter high
+
+    if not 0 < fraction < 1:
+        raise ValueError("The height fraction of a truncation must be between 0 and 1, not " + str(fraction))
+
+    return np.array([0.0, 0.0, 1.0]), rad * (1 - 2 * float(fraction))
+
+
+def Clip(nodes, edges, triangles, normal, offset, precision='double'):
+    # Keep the part of the mesh on the normal side of the plane. Returns
+    # the new nodes, in the dtype they came in, edges and triangles, in the
+    # node number dtype of precision for the new node count
+    # (GeoMesh.Index_Dtype), and the number of struts cut, triangles cut
+    # and triangles dropped. A plane missing the mesh keeps all of it.
+
+    normal = np.asarray(normal, dtype=np.float64)
+    length = float(np.sqrt((normal ** 2).sum()))
+    if length == 0:
+        raise ValueError("The normal of a truncation plane must not be zero")
+    normal, offset = normal / length, offset / length
+
+    points = nodes.astype(np.float64)
+    edges = edges.astype(np.int64, copy=False)
+    tri = triangles.astype(np.int64, copy=False)
+    nV = len(points)
+
+    s = points @ normal - offset
+
+    struts = np.sqrt(((points[edges[:, 0]] - points[edges[:, 1]]) ** 2).sum(axis=1))
+    on = np.abs(s) <= SNAP * struts.min()
+    points[on] -= s[on, None] * normal
+    s[on] = 0
+
+    # New node on every strut crossing the plane
+    sa, sb = s[edges[:, 0]], s[edges[:, 1]]
+    cut = np.nonzero(sa * sb < 0)[0]
+    t = (sa[cut] / (sa[cut] - sb[cut]))[:, None]
+    crossings = points[edges[cut, 0]] + t * (points[edges[cut, 1]] - points[edges[cut, 0]])
+
+    crossing_number = np.full(len(edges), -1, dtype=np.int64)
+    crossing_number[cut] = nV + np.arange(len(cut))
+
+    # Triangles with no corner below are kept whole, those with none above
+    # dropped, the rest clipped
+    corner_s = s[tri]
+    whole = (corner_s >= 0).all(axis=1)
+    clipped = ~whole & (corner_s > 0).any(axis=1)
+
+    if not (whole | clipped).any():
+        raise ValueError("The truncation plane leaves nothing of the dome")
+
+    part = np.compress(clipped, tri, axis=0)
+    part_s = np.compress(clipped, corner_s, axis=0)
+    sides = HE.HalfEdge(part, edges, nV).Edge.reshape(-1, 3)
+
+    # The part above as a polygon of the corners not below and the
+    # crossings, in winding order (a, ab, b, bc, c, ca), -1 for those
+    # that are not there. It has three or four sides.
+    slots = np.empty((len(part), 6), dtype=np.int64)
+    slots[:, 0::2] = np.where(part_s >= 0, part, -1)
+    slots[:, 1::2] = crossing_number[sides]
+
+    there = slots >= 0
+    polygon = np.take_along_axis(slots, np.argsort(~there, axis=1, kind='stable')[:, :4], axis=1)
+    quad = there.sum(axis=1) == 4
+
+    new_triangles = np.concatenate([
+        np.compress(whole, tri, axis=0),
+        polygon[:, :3],
+        polygon[quad][:, [0, 2, 3]]])
+
+    # Drop the nodes below and number the rest in order
+    points = np.concatenate([points, crossings])
+    keep = np.zeros(len(points), dtype=bool)
+    keep[new_triangles.ravel()] = True
+    new_number = np.cumsum(keep) - 1
+
+    new_nodes = np.compress(keep, points, axis=0)
+    new_triangles = new_number[new_triangles]
+    new_edges = GM.Edges_From_Triangles(new_triangles, len(new_nodes))
+
+    index_dtype = GM.Index_Dtype(len(new_nodes), precision)
+
+    return (new_nodes.astype(nodes.dtype, copy=False), new_edges.astype(index_dtype, copy=False),
+            new_triangles.astype(index_dtype, copy=False),
+            (len(cut), len(part), int(np.count_nonzero(~(whole | clipped)))))
+
+
+def Base_Ring(nodes, edges, triangles):
+    # Nodes of the base of a cut mesh in order round it, with the mesh on
+    # the left, from its boundary loops. In the dtype of the triangles.
+
+    loops = HE.HalfEdge(triangles, edges, len(nodes)).Boundary_Loops()
+    if not loops:
+        return np.zeros(0, dtype=triangles.dtype)
+
+    return np.concatenate(loops).astype(triangles.dtype, copy=False)
@@ -0,0 +1,130 @@
+# Mesh checks before a dome goes to Abaqus
+#
+# Every check works on the node, edge and triangle arrays with sorts,
+# searchsorted and bincount, so the whole report costs O(E log E) and is
+# left on for every run. The sides, manifold and orientation checks read
+# the half-edges of the mesh (HalfEdge.py). The checks:
+#
+#   struts        no strut joins a node to itself
+#   duplicates    no strut is listed twice
+#   degenerate    no triangle repeats a node or has no area
+#   sides         every side of a triangle is in the edge list
+#   manifold      every strut belongs to two triangles, or one on the
+#                 boundary of a dome, never none or more than two
+#   orientation   no side is run the same way by two triangles, so
+#                 neighbouring triangles are wound alike
+#   outward       the triangles enclose a positive volume, so they face out
+#   euler         V - E + F is 2 for a sphere and 1 for a dome
+#   connected     every node is reached from node 0 along the struts
+#
+# Validate returns a row per check: its name, the number of problems and a
+# short description. Check raises MeshError when any check has problems.
+
+import numpy as np
+
+import HalfEdge as HE
+import Renumber as R
+
+
+# Triangles with less area than this, relative to the squared radius,
+# have none
+AREA_TINY = 1e-12
+
+
+class MeshError(ValueError):
+    pass
+
+
+def Validate(nodes, edges, triangles, dome):
+    # Check the mesh, returns a list of (check, problems, detail)
+
+    nodes = np.asarray(nodes, dtype=np.float64)
+    edges = np.asarray(edges).astype(np.int64, copy=False)
+    triangles = np.asarray(triangles).astype(np.int64, copy=False)
+
+    nV, nE, nF = len(nodes), len(edges), len(triangles)
+    report = list()
+
+    low = np.minimum(edges[:, 0], edges[:, 1])
+    high = np.maximum(edges[:, 0], edges[:, 1])
+
+    loops = int(np.count_nonzero(low == high))
+    report.append(("struts", loops, "{} struts join a node to itself".format(loops)))
+
+    edge_keys = np.sort(low * nV + high)
+    doubled = int(np.count_nonzero(edge_keys[1:] == edge_keys[:-1]))
+    report.append(("duplicates", doubled, "{} struts listed twice".format(doubled)))
+
+    a, b, c = triangles[:, 0], triangles[:, 1], triangles[:, 2]
+    P = nodes[triangles]
+    cross = np.cross(P[:, 1] - P[:, 0], P[:, 2] - P[:, 0])
+    radius = float(np.sqrt((nodes ** 2).sum(axis=1).max())) if nV else 0.0
+    flat = (a == b) | (b == c) | (c == a) | (np.sqrt((cross ** 2).sum(axis=1)) <= AREA_TINY * radius * radius)
+    degenerate = int(np.count_nonzero(flat))
+    report.append(("degenerate", degenerate, "{} triangles without area".format(degenerate)))
+
+    mesh = HE.HalfEdge(triangles, edges, nV)
+
+    missing = int(np.count_nonzero(mesh.Edge < 0))
+    report.append(("sides", missing, "{} triangle sides not in the edge list".format(missing)))
+
+    uses = mesh.Uses()
+    boundary = int(np.count_nonzero(uses == 1))
+    wrong = int(np.count_nonzero((uses == 0) | (uses > 2)))
+    report.append(("manifold", wrong + (0 if dome else boundary),
+                   "{} struts in no or more than 2 triangles, {} on the boundary".format(wrong, boundary)))
+
+    # The half-edges of a strut in neighbouring triangles wound alike run
+    # opposite ways, so no strut and direction is run twice. Twins are
+    # compared directly, the few struts in more than two triangles sorted.
+    paired = np.nonzero(mesh.Twin >= 0)[0]
+    same_way = int(np.count_nonzero(mesh.Vertex[mesh.Twin[paired]] == mesh.Vertex[paired])) // 2
+
+    crowded = np.nonzero(uses[np.maximum(mesh.Edge, 0)] * (mesh.Edge >= 0) > 2)[0]
+    forward = mesh.Vertex[crowded] < mesh.Vertex[mesh.Next[crowded]]
+    directed = np.sort(mesh.Edge[crowded] * 2 + forward)
+    same_way += int(np.count_nonzero(directed[1:] == directed[:-1]))
+    report.append(("orientation", same_way, "{} sides run the same way by two triangles".format(same_way)))
+
+    volume = float(np.einsum('ij,ij->', cross, P[:, 0])) / 6.0
+    report.append(("outward", int(volume <= 0), "enclosed volume {:.6g}".format(volume)))
+
+    euler = nV - nE + nF
+    expected = 1 if dome else 2
+    report.append(("euler", int(euler != expected), "V - E + F = {}, {} expected".format(euler, expected)))
+
+    reached = 0
+    if nV:
+        indptr, indices = R.Adjacency(edges, nV)
+        reached = sum(len(level) for level in R.Levels(indptr, indices, 0))
+    report.append(("connected", nV - reached, "{} of {} nodes reached from node 1".format(reached, nV)))
+
+    return report
+
+
+def Failures(report):
+    return [row for row in report if row[1]]
+
+
+def Print_Report(report):
+
+    for check, problems, detail in report:
+        print ("  {:<12} {:<8} {}".format(check, "ok" if not problems else "FAILED", detail))
+
+
+def Check(nodes, edges, triangles, dome):
+    # Validate and print a one line summary, or the whole report and
+    # MeshError when a check fails
+
+    report = Validate(nodes, edges, triangles, dome)
+
+    if Failures(report):
+        print ("Mesh check failed:")
+        Print_Report(report)
+        raise MeshError("The mesh failed " + ", ".join(row[0] for row in Failures(report))
+                        + ", no files written. Use --no-validate to write it anyway.")
+
+    print ("Mesh check passed: V - E + F = " + str(len(nodes) - len(edges) + len(triangles)) + ", "
+           + str(len(nodes)) + " nodes connected")
+
+    return report
@@ -0,0 +1,311 @@
+# Output files for the dome
+#
+# txt: Nodes.txt, Edges.txt and Triangles.txt with one node, edge or
+#      triangle per line and 1 based node numbers, as read by
+#      Abaqus_Input_Script.py
+# npy: Nodes.npy, Edges.npy and Triangles.npy numpy arrays with 0 based
+#      node numbers. The .npy header records the dtype and shape, so
+#      Read_Binary can memory-map them. The arrays are written in the dtype
+#      they are given in, float32/uint16 or int32 for compact meshes.
+# inp: Dome.inp, an Abaqus input fragment with the nodes as a *NODE block
+#      and the triangles as S3 shell elements, for cladding and membrane
+#      models. The triangles are wound anticlockwise seen from outside, so
+#      the shell normals point out. Include it with *INCLUDE, INPUT=Dome.inp.
+#
+# A truncated dome also gets its ring of base nodes, Base.txt (1 based, one
+# per line), Base.npy or the DOME_BASE node set of Dome.inp.
+#
+# The text files are made as Python strings, which takes several times the
+# memory of the arrays. Write_Text with stream set makes them STREAM_ROWS
+# lines at a time instead, Footprint estimates both. A block of lines is
+# made by one % of the line template repeated for every row, with the
+# values of the block flattened into one tuple, so the formatting loop runs
+# in C rather than a str.format per row.
+#
+# Write_Files given a thread pool writes every file on it at once and
+# returns the futures, so the caller can go on (with the statistics) while
+# they are written and Wait for them after. The formatting holds the GIL,
+# the threads overlap the disk writes, np.save and the caller's numpy work
+# with it.
+#
+# With compress set to a level from 1 to 9 every file is written through
+# gzip as it is made, Nodes.txt.gz, Nodes.npy.gz, Dome.inp.gz ..., and the
+# uncompressed file of the same name is removed so a reader finds the one
+# just written. Read_Binary and Abaqus_Input_Script.py read either. A .npy
+# read from .gz is decompressed into memory, it cannot be memory-mapped.
+
+import gzip
+import os
+
+import numpy as np
+
+
+FORMATS = ('txt', 'npy', 'inp')
+
+# Lines made at a time by Write_Text when streaming
+STREAM_ROWS = 1 << 16
+
+# Memory taken per line while a text file is made, measured: a node line
+# (float32 nodes first become strings) and each node number of an edge or
+# triangle line
+NODE_LINE_BYTES = {np.dtype(np.float64): 175, np.dtype(np.float32): 600}
+INDEX_BYTES = 55
+
+# Average text length of a coordinate with its separator
+COORDINATE_TEXT = {np.dtype(np.float64): 20, np.dtype(np.float32): 11}
+
+NPY_HEADER = 128
+
+# Size of a gzip file over that of the file, measured from 0.23 (Edges.txt)
+# to 0.72 (Nodes.npy), 0.35 to 0.4 for whole runs, about the same from
+# level 1 to 9
+COMPRESSED_SIZE = 0.4
+
+# Set names of the nodes and shell elements in Dome.inp
+NODE_SET = 'DOME_NODES'
+SHELL_SET = 'DOME_SHELL'
+BASE_SET = 'DOME_BASE'
+
+# Most entries Abaqus reads from one data line
+INP_ENTRIES = 16
+
+
+def Format_Block(block, line, rows, start):
+    # The lines of block joined by newlines. rows turns the block and the
+    # number of its first row into the flat list of values, row by row,
+    # that the %s of line are filled with.
+
+    return '\n'.join([line] * len(block)) % tuple(rows(block, start))
+
+
+def Write_Block(fp, array, line, rows, chunk):
+    # One line per row of array, made `chunk` rows at a time
+
+    for start in range(0, len(array), chunk):
+        if start:
+            fp.write('\n')
+        fp.write(Format_Block(array[start:start + chunk], line, rows, start))
+
+
+def Open_File(path, mode, compress=0):
+    # path opened for writing, or path + '.gz' compressed at level compress.
+    # The other of the two is removed.
+
+    other = path if compress else path + '.gz'
+    if os.path.exists(other):
+        os.remove(other)
+
+    if compress:
+        return gzip.open(path + '.gz', mode, compresslevel=compress)
+    return open(path, mode)
+
+
+def Find_File(path):
+    # path, or path + '.gz' when only that was written
+
+    if not os.path.exists(path) and os.path.exists(path + '.gz'):
+        return path + '.gz'
+    return path
+
+
+def Write_Lines(path, array, line, rows, chunk, compress=0):
+
+    with Open_File(path, 'wt', compress) as fp:
+        Write_Block(fp, array, line, rows, chunk)
+
+
+def Node_Rows(block, start):
+    # float32 nodes are written with the shortest text that reads back as
+    # the same float32, not as the float64 they widen to
+
+    if block.dtype == np.float32:
+        return block.astype(str).ravel().tolist()
+    return block.ravel().tolist()
+
+
+def Index_Rows(block, start):
+    # 1 based node numbers
+    return (block + 1).ravel().tolist()
+
+
+def Numbered_Rows(rows):
+    # rows with the 1 based row number in front, for Abaqus data lines
+
+    def numbered(block, start):
+        values = rows(block, start)
+        width = block.shape[1] + 1
+
+        flat = [None] * (len(block) * width)
+        flat[0::width] = range(start + 1, start + len(block) + 1)
+        for k in range(1, width):
+            flat[k::width] = values[k - 1::width - 1]
+
+        return flat
+
+    return numbered
+
+
+def Text_Files(directory, nodes, edges, triangles, stream=False, base=None, compress=0):
+    # (write, arguments) of every text file
+
+    chunk = STREAM_ROWS if stream else max(len(nodes), len(edges), len(triangles), 1)
+
+    files = [(Write_Lines, (os.path.join(directory, 'Nodes.txt'), nodes, '%s %s %s', Node_Rows, chunk, compress)),
+             (Write_Lines, (os.path.join(directory, 'Edges.txt'), edges, '%s %s', Index_Rows, chunk, compress)),
+             (Write_Lines, (os.path.join(directory, 'Triangles.txt'), triangles, '%s %s %s', Index_Rows, chunk, compress))]
+
+    if base is not None:
+        files.append((Write_Lines, (os.path.join(directory, 'Base.txt'), base[:, None], '%s', Index_Rows, chunk, compress)))
+
+    return files
+
+
+def Write_Text(directory, nodes, edges, triangles, stream=False, base=None, compress=0):
+
+    for write, arguments in Text_Files(directory, nodes, edges, triangles, stream, base, compress):
+        write(*arguments)
+
+
+def Write_Inp(directory, nodes, triangles, stream=False, base=None, compress=0):
+
+    chunk = STREAM_ROWS if stream else max(len(nodes), len(triangles), 1)
+
+    with Open_File(os.path.join(directory, 'Dome.inp'), 'wt', compress) as fp:
+        fp.write('*NODE, NSET=' + NODE_SET + '\n')
+        Write_Block(fp, nodes, '%s, %s, %s, %s', Numbered_Rows(Node_Rows), chunk)
+        fp.write('\n*ELEMENT, TYPE=S3, ELSET=' + SHELL_SET + '\n')
+        Write_Block(fp, triangles, '%s, %s, %s, %s', Numbered_Rows(Index_Rows), chunk)
+        fp.write('\n')
+
+        if base is not None:
+            fp.write('*NSET, NSET=' + BASE_SET + '\n')
+            for start in range(0, len(base), INP_ENTRIES):
+                fp.write(', '.join(str(v) for v in Index_Rows(base[start:start + INP_ENTRIES], start)) + '\n')
+
+
+def Save_Array(path, array, compress=0):
+
+    with Open_File(path, 'wb', compress) as fp:
+        np.save(fp, array)
+
+
+def Load_Array(path, mmap=True):
+    # The array of a .npy file, or of its .npy.gz decompressed as it is read
+
+    path = Find_File(path)
+
+    # np.load reads the .npy format as bytes, unlike the text files
+    if path.endswith('.gz'):
+        with gzip.open(path, 'rb') as fp:
+            return np.load(fp)
+
+    return np.load(path, mmap_mode='r' if mmap else None)
+
+
+def Binary_Files(directory, nodes, edges, triangles, base=None, compress=0):
+    # (write, arguments) of every .npy file
+
+    files = [(Save_Array, (os.path.join(directory, 'Nodes.npy'), nodes, compress)),
+             (Save_Array, (os.path.join(directory, 'Edges.npy'), edges, compress)),
+             (Save_Array, (os.path.join(directory, 'Triangles.npy'), triangles, compress))]
+
+    if base is not None:
+        files.append((Save_Array, (os.path.join(directory, 'Base.npy'), base, compress)))
+
+    return files
+
+
+def Write_Binary(directory, nodes, edges, triangles, base=None, compress=0):
+
+    for write, arguments in Binary_Files(directory, nodes, edges, triangles, base, compress):
+        write(*arguments)
+
+
+def Read_Binary(directory, mmap=True):
+    # Load the arrays written by Write_Binary, memory-mapped unless mmap is
+    # False or they were compressed
+
+    nodes = Load_Array(os.path.join(directory, 'Nodes.npy'), mmap)
+    edges = Load_Array(os.path.join(directory, 'Edges.npy'), mmap)
+    triangles = Load_Array(os.path.join(directory, 'Triangles.npy'), mmap)
+
+    return nodes, edges, triangles
+
+
+def Footprint(formats, nV, nE, nF, node_dtype, index_dtype, stream=False, threads=0, compress=0):
+    # Estimated disk space of the files and peak memory taken while they
+    # are written, in bytes, for a mesh of the given size and dtypes. With
+    # threads the largest that many files are made at once, with compress
+    # they are gzip files.
+
+    disk = 0
+    memory = list()
+
+    lines = lambda n: min(n, STREAM_ROWS) if stream else n
+
+    if 'txt' in formats:
+        digits = len(str(nV)) + 1
+        disk += nV * 3 * COORDINATE_TEXT[node_dtype] + nE * 2 * digits + nF * 3 * digits
+
+        memory += [lines(nV) * NODE_LINE_BYTES[node_dtype], lines(nE) * 2 * INDEX_BYTES, lines(nF) * 3 * INDEX_BYTES]
+
+    if 'npy' in formats:
+        disk += 3 * NPY_HEADER + nV * 3 * node_dtype.itemsize + (nE * 2 + nF * 3) * index_dtype.itemsize
+
+    if 'inp' in formats:
+        # Every line also starts with its number, the nodes and then the
+        # triangles are made
+        digits = len(str(max(nV, nF))) + 2
+        disk += nV * (3 * COORDINATE_TEXT[node_dtype] + digits) + nF * 4 * digits
+
+        memory.append(max(lines(nV) * (NODE_LINE_BYTES[node_dtype] + INDEX_BYTES), lines(nF) * 4 * INDEX_BYTES))
+
+    if compress:
+        disk = int(disk * COMPRESSED_SIZE)
+
+    memory.sort(reverse=True)
+
+    return disk, sum(memory[:max(threads, 1)])
+
+
+def Write_Files(directory, formats, nodes, edges, triangles, stream=False, base=None, pool=None, compress=0):
+    # base is the ring of base nodes of a truncated dome, or None. With a
+    # concurrent.futures pool the files are submitted to it and the futures
+    # returned, for Wait, otherwise they are written in turn. compress is
+    # the gzip level, 0 for none.
+
+    if not 0 <= compress <= 9:
+        raise ValueError("The compression level must be from 0 to 9, not " + str(compress))
+
+    for f in formats:
+        if f not in FORMATS:
+            raise ValueError("Unknown output format '" + f + "', use one of " + ", ".join(FORMATS))
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    files = list()
+
+    if 'txt' in formats:
+        files += Text_Files(directory, nodes, edges, triangles, stream, base, compress)
+
+    if 'npy' in formats:
+        files += Binary_Files(directory, nodes, edges, triangles, base, compress)
+
+    if 'inp' in formats:
+        files.append((Write_Inp, (directory, nodes, triangles, stream, base, compress)))
+
+    if pool is None:
+        for write, arguments in files:
+            write(*arguments)
+        return list()
+
+    return [pool.submit(write, *arguments) for write, arguments in files]
+
+
+def Wait(pending):
+    # Wait for the files submitted by Write_Files, raises the first error
+    # of any of them
+
+    for future in pending:
+        future.result()
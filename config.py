@@ -11,6 +11,18 @@ Dome_calc = True    # Calculate for sphere (=False) or dome (=True)
 Icosohedral = False #Set to false to generate spherical dome or true for icosohedral dome
 Cylindrical = False
 Cut_Point = .8 #Set to a number 0<x<1 to determine point at which the cut is made
+Truncate = None # Set to a fraction of the sphere diameter, e.g. 0.375 or 0.625, to cut the sphere at a level base instead of Dome_calc
+Engine = 'legacy' # 'legacy' for the GeoSphere objects or 'fast' for the GeoMesh arrays
+Symmetric = False # fast engine only: divide one icosahedron face and rotate it into the other 19
+Precision = 'double' # 'double' for Abaqus or 'compact' (float32 nodes, smaller node numbers) for previews of very large domes
+Renumber = 'none' # 'rcm' renumbers the nodes with Reverse Cuthill-McKee before writing, for a smaller stiffness matrix bandwidth in Abaqus. 'morton' or 'hilbert' order the nodes along a space filling curve and the elements by node
+Memory_Budget_MB = 4096 # Largest memory a run may plan to use. Above it the text files are written in chunks, or the dome is refused if that is not enough. 0 for no limit
+Merge_Tolerance = 1e-6 # Nodes closer than this are merged before writing, Abaqus cannot draw a line between points closer than 1e-6. 0 to keep every node
+Validate = True # Check every mesh (no duplicate or dangling edges, consistent winding, V - E + F, connected) before writing it
+Cache_Dir = None # Set to a directory to keep the projected mesh between runs, so a run changing only R_mm or the cut reuses it
+Compress_Level = 0 # Set to a gzip level from 1 (fastest) to 9 (smallest) to write every output file compressed, Nodes.txt.gz etc. 0 writes them as they are
+Write_Threads = 4 # Output files written at once, while the statistics are worked out. 0 writes them one after another
+Count_Operations = False # Set to true to print per stage timings and call counts of the hot methods
 #------------------------------------------------------------------
 # System variablesrivedr
 
@@ -116,69 +116,319 @@ def cyl2cart(r, phi, z):
         return (x.squeeze(), y.squeeze(), z.squeeze())
     return (x, y, z)
 
+def workspace(n, dtype=np.float64):
+    """Returns scratch space for the (N, 3) array transforms.
+
+    Args:
+        n (int): Number of points N.
+        dtype (numpy.dtype): Float type of the points.
+
+    Returns:
+        Numpy array of shape (2, N) to pass as work to cart2sp_array,
+        sp2cart_array, cart2cyl_array and cyl2cart_array.
+    """
+    return np.empty((2, n), dtype=dtype)
+
+def _float_dtype(v):
+    """Returns the float type results of v are computed in, float32 for
+    float32 points and float64 otherwise."""
+    return np.result_type(v.dtype, np.float32)
+
+def _array_args(v, out, work):
+    """Checks the (N, 3) input and allocates out and work if not given."""
+    if v.ndim != 2 or v.shape[1] != 3:
+        raise ValueError("expected an (N, 3) array, got shape {}".format(v.shape))
+    if out is None:
+        out = np.empty(v.shape, dtype=_float_dtype(v))
+    elif out.shape != v.shape:
+        raise ValueError("out has shape {}, expected {}".format(out.shape, v.shape))
+    if work is None:
+        work = workspace(len(v), out.dtype)
+    elif work.shape != (2, len(v)):
+        raise ValueError("work has shape {}, expected {}".format(work.shape, (2, len(v))))
+    return out, work[0], work[1]
+
+def cart2sp_array(v, out=None, work=None):
+    """Converts an (N, 3) array from cartesian coordinates into spherical
+    without allocating when out and work are given. out may be v itself.
+
+    Args:
+        v (numpy.ndarray): (N, 3) array of x, y, z.
+        out (numpy.ndarray): (N, 3) array for the result.
+        work (numpy.ndarray): (2, N) scratch space from workspace(N).
+
+    Returns:
+        out, (N, 3) array of r, theta, phi.
+    """
+    out, w0, w1 = _array_args(v, out, work)
+    x, y, z = v[:, 0], v[:, 1], v[:, 2]
+    np.multiply(x, x, out=w0)
+    np.multiply(y, y, out=w1)
+    np.add(w0, w1, out=w0)
+    np.multiply(z, z, out=w1)
+    np.add(w0, w1, out=w0)
+    np.sqrt(w0, out=w0)
+    np.arctan2(y, x, out=w1)
+    np.divide(z, w0, out=out[:, 1])
+    np.arcsin(out[:, 1], out=out[:, 1])
+    out[:, 0] = w0
+    out[:, 2] = w1
+    return out
+
+def sp2cart_array(v, out=None, work=None):
+    """Converts an (N, 3) array from spherical coordinates into cartesian
+    without allocating when out and work are given. out may be v itself.
+
+    Args:
+        v (numpy.ndarray): (N, 3) array of r, theta, phi.
+        out (numpy.ndarray): (N, 3) array for the result.
+        work (numpy.ndarray): (2, N) scratch space from workspace(N).
+
+    Returns:
+        out, (N, 3) array of x, y, z.
+    """
+    out, w0, w1 = _array_args(v, out, work)
+    r, theta, phi = v[:, 0], v[:, 1], v[:, 2]
+    np.cos(theta, out=w0)
+    np.multiply(w0, r, out=w0)
+    np.sin(theta, out=w1)
+    np.multiply(w1, r, out=w1)
+    np.cos(phi, out=out[:, 0])
+    np.multiply(out[:, 0], w0, out=out[:, 0])
+    np.sin(phi, out=out[:, 1])
+    np.multiply(out[:, 1], w0, out=out[:, 1])
+    out[:, 2] = w1
+    return out
+
+def cart2cyl_array(v, out=None, work=None):
+    """Converts an (N, 3) array from cartesian coordinates into cylindrical
+    without allocating when out and work are given. out may be v itself.
+
+    Args:
+        v (numpy.ndarray): (N, 3) array of x, y, z.
+        out (numpy.ndarray): (N, 3) array for the result.
+        work (numpy.ndarray): (2, N) scratch space from workspace(N).
+
+    Returns:
+        out, (N, 3) array of r, phi, z.
+    """
+    out, w0, w1 = _array_args(v, out, work)
+    x, y, z = v[:, 0], v[:, 1], v[:, 2]
+    np.multiply(x, x, out=w0)
+    np.multiply(y, y, out=w1)
+    np.add(w0, w1, out=w0)
+    np.sqrt(w0, out=w0)
+    np.arctan2(y, x, out=w1)
+    out[:, 0] = w0
+    out[:, 1] = w1
+    out[:, 2] = z
+    return out
+
+def cyl2cart_array(v, out=None, work=None):
+    """Converts an (N, 3) array from cylindrical coordinates into cartesian
+    without allocating when out and work are given. out may be v itself.
+
+    Args:
+        v (numpy.ndarray): (N, 3) array of r, phi, z.
+        out (numpy.ndarray): (N, 3) array for the result.
+        work (numpy.ndarray): (2, N) scratch space from workspace(N).
+
+    Returns:
+        out, (N, 3) array of x, y, z.
+    """
+    out, w0, w1 = _array_args(v, out, work)
+    r, phi, z = v[:, 0], v[:, 1], v[:, 2]
+    np.cos(phi, out=w0)
+    np.multiply(w0, r, out=w0)
+    np.sin(phi, out=w1)
+    np.multiply(w1, r, out=w1)
+    out[:, 0] = w0
+    out[:, 1] = w1
+    out[:, 2] = z
+    return out
+
+def project_sphere(v, R, out=None, where=None, work=None):
+    """Projects an (N, 3) array of points radially onto the sphere of
+    radius R around the origin, by scaling every point by R/|v|.
+
+    Args:
+        v (numpy.ndarray): (N, 3) array of x, y, z.
+        R (scalar): Radius of the sphere.
+        out (numpy.ndarray): (N, 3) array for the result, may be v itself.
+        where (array_like): (N,) boolean mask of the points to project.
+            Rows where it is False are left as they are in out, or copied
+            from v when out is not given.
+        work (numpy.ndarray): (2, N) scratch space from workspace(N).
+
+    Returns:
+        out, (N, 3) array of x, y, z.
+    """
+    if out is None:
+        out = np.array(v, dtype=_float_dtype(v))
+    out, w0, w1 = _array_args(v, out, work)
+    np.einsum('ij,ij->i', v, v, out=w0)
+    np.sqrt(w0, out=w0)
+    np.divide(R, w0, out=w0)
+    if where is None:
+        np.multiply(v, w0[:, None], out=out)
+    else:
+        mask = np.asarray(where)
+        for k in range(3):
+            np.multiply(v[:, k], w0, out=out[:, k], where=mask)
+    return out
+
+def project_cylinder(v, R, out=None, where=None, work=None):
+    """Projects an (N, 3) array of points radially onto the cylinder of
+    radius R around the Z axis, by scaling the x and y components of every
+    point by R/|(x, y)|. Points on the axis go to (R, 0, z), as with
+    cart2cyl and cyl2cart.
+
+    Args:
+        v (numpy.ndarray): (N, 3) array of x, y, z.
+        R (scalar): Radius of the cylinder.
+        out (numpy.ndarray): (N, 3) array for the result, may be v itself.
+        where (array_like): (N,) boolean mask of the points to project.
+            Rows where it is False are left as they are in out, or copied
+            from v when out is not given.
+        work (numpy.ndarray): (2, N) scratch space from workspace(N).
+
+    Returns:
+        out, (N, 3) array of x, y, z.
+    """
+    if out is None:
+        out = np.array(v, dtype=_float_dtype(v))
+    out, w0, w1 = _array_args(v, out, work)
+    mask = True if where is None else np.asarray(where)
+    x, y = v[:, 0], v[:, 1]
+    np.multiply(x, x, out=w0)
+    np.multiply(y, y, out=w1)
+    np.add(w0, w1, out=w0)
+    np.sqrt(w0, out=w0)
+    on_axis = np.flatnonzero(w0 == 0)
+    w0[on_axis] = 1
+    np.divide(R, w0, out=w0)
+    for k in range(2):
+        np.multiply(v[:, k], w0, out=out[:, k], where=mask)
+    np.copyto(out[:, 2], v[:, 2], where=mask)
+    if len(on_axis):
+        if where is not None:
+            on_axis = on_axis[mask[on_axis]]
+        out[on_axis, 0] = R
+        out[on_axis, 1] = 0
+    return out
+
 def mx_rot_x(gamma):
     """Returns rotational matrix for right-handed rotation
     around X axis.
 
     Args:
-        gamma (scalar): Rotation angle around X in radians.
+        gamma (scalar or array_like): Rotation angle around X in radians.
 
     Returns:
-        Numpy rotational matrix.
+        Numpy rotational matrix for a scalar angle, otherwise an ndarray
+        stack of rotational matrices of shape gamma.shape + (3, 3).
     """
-    return np.matrix([
-        [1, 0, 0],
-        [0, np.cos(gamma), -np.sin(gamma)],
-        [0, np.sin(gamma), np.cos(gamma)]
-    ])
+    if np.ndim(gamma) == 0:
+        return np.matrix([
+            [1, 0, 0],
+            [0, np.cos(gamma), -np.sin(gamma)],
+            [0, np.sin(gamma), np.cos(gamma)]
+        ])
+    c, s = _cos_sin(gamma)
+    T = np.zeros(c.shape + (3, 3))
+    T[..., 0, 0] = 1
+    T[..., 1, 1] = c
+    T[..., 1, 2] = -s
+    T[..., 2, 1] = s
+    T[..., 2, 2] = c
+    return T
 
 def mx_rot_y(theta):
     """Returns rotational matrix for right-handed rotation
     around Y axis.
 
     Args:
-        theta (scalar): Rotation angle around Y in radians.
+        theta (scalar or array_like): Rotation angle around Y in radians.
 
     Returns:
-        Numpy rotational matrix.
+        Numpy rotational matrix for a scalar angle, otherwise an ndarray
+        stack of rotational matrices of shape theta.shape + (3, 3).
     """
-    return np.matrix([
-        [np.cos(theta), 0, np.sin(theta)],
-        [0, 1, 0],
-        [-np.sin(theta), 0, np.cos(theta)]
-    ])
+    if np.ndim(theta) == 0:
+        return np.matrix([
+            [np.cos(theta), 0, np.sin(theta)],
+            [0, 1, 0],
+            [-np.sin(theta), 0, np.cos(theta)]
+        ])
+    c, s = _cos_sin(theta)
+    T = np.zeros(c.shape + (3, 3))
+    T[..., 0, 0] = c
+    T[..., 0, 2] = s
+    T[..., 1, 1] = 1
+    T[..., 2, 0] = -s
+    T[..., 2, 2] = c
+    return T
 
 def mx_rot_z(phi):
     """Returns rotational matrix for right-handed rotation
     around Z axis.
 
     Args:
-        phi (scalar): Rotation angle around Z in radians.
+        phi (scalar or array_like): Rotation angle around Z in radians.
 
     Returns:
-        Numpy rotational matrix.
+        Numpy rotational matrix for a scalar angle, otherwise an ndarray
+        stack of rotational matrices of shape phi.shape + (3, 3).
     """
-    return np.matrix([
-        [np.cos(phi), -np.sin(phi), 0],
-        [np.sin(phi), np.cos(phi), 0],
-        [0, 0, 1]
-    ])
+    if np.ndim(phi) == 0:
+        return np.matrix([
+            [np.cos(phi), -np.sin(phi), 0],
+            [np.sin(phi), np.cos(phi), 0],
+            [0, 0, 1]
+        ])
+    c, s = _cos_sin(phi)
+    T = np.zeros(c.shape + (3, 3))
+    T[..., 0, 0] = c
+    T[..., 0, 1] = -s
+    T[..., 1, 0] = s
+    T[..., 1, 1] = c
+    T[..., 2, 2] = 1
+    return T
+
+def _cos_sin(angle):
+    """Returns cosine and sine of an array of angles."""
+    angle = np.asarray(angle, dtype=np.float64)
+    return (np.cos(angle), np.sin(angle))
+
+def _broadcast_angles(*angles):
+    """Returns the angles unchanged if all are scalars, otherwise as
+    arrays broadcast to a common shape with at least one dimension."""
+    if all(np.ndim(a) == 0 for a in angles):
+        return angles
+    return np.broadcast_arrays(*[np.atleast_1d(a) for a in angles])
 
 def mx_rot(theta, phi, gamma):
     """Returns rotational matrix for compound rotation
     around X, Y and Z axes. The order of rotation is X-Y-Z.
 
     Args:
-        theta (scalar): Rotation angle around Y in radians.
-        phi (scalar): Rotational angle around in Z radians.
-        gamma (scalar): Rotational angle around X in radians.
+        theta (scalar or array_like): Rotation angle around Y in radians.
+        phi (scalar or array_like): Rotational angle around in Z radians.
+        gamma (scalar or array_like): Rotational angle around X in radians.
 
     Returns:
-        Numpy rotational matrix.
+        Numpy rotational matrix if all angles are scalars, otherwise an
+        ndarray stack of shape (K, 3, 3) for K broadcast angles.
     """
-    return np.dot(
+    theta, phi, gamma = _broadcast_angles(theta, phi, gamma)
+    if np.ndim(theta) == 0:
+        return np.dot(
+            mx_rot_z(phi),
+            np.dot(mx_rot_y(theta), mx_rot_x(gamma))
+        )
+    return np.matmul(
         mx_rot_z(phi),
-        np.dot(mx_rot_y(theta), mx_rot_x(gamma))
+        np.matmul(mx_rot_y(theta), mx_rot_x(gamma))
     )
 
 def mx_rot_reverse(theta, phi, gamma):
@@ -186,30 +436,50 @@ def mx_rot_reverse(theta, phi, gamma):
     around X, Y and Z axes. The order of rotation is Z-Y-X.
 
     Args:
-        theta (scalar): Rotational angle around Y in radians.
-        phi (scalar): Rotational angle around in Z radians.
-        gamma (scalar): Rotational angle around X in radians.
+        theta (scalar or array_like): Rotational angle around Y in radians.
+        phi (scalar or array_like): Rotational angle around in Z radians.
+        gamma (scalar or array_like): Rotational angle around X in radians.
 
     Returns:
-        Numpy rotational matrix.
+        Numpy rotational matrix if all angles are scalars, otherwise an
+        ndarray stack of shape (K, 3, 3) for K broadcast angles.
     """
-    return np.dot(
+    theta, phi, gamma = _broadcast_angles(theta, phi, gamma)
+    if np.ndim(theta) == 0:
+        return np.dot(
+            mx_rot_x(gamma),
+            np.dot(mx_rot_y(theta), mx_rot_z(phi))
+        )
+    return np.matmul(
         mx_rot_x(gamma),
-        np.dot(mx_rot_y(theta), mx_rot_z(phi))
+        np.matmul(mx_rot_y(theta), mx_rot_z(phi))
     )
 
-def mx_apply(T, x, y, z):
+def mx_apply(T, x, y=None, z=None):
     """Applies rotation to data using rotational matrix.
 
+    T may be a single matrix or a (K, 3, 3) stack of matrices, in which
+    case every rotation is applied to the data in one call. The data is
+    either given as separate components x, y, z, or as a single (N, 3)
+    array of points in x with y and z left out.
+
     Args:
-        T (numpy.matrix): Rotational matrix.
-        x (scalar or array_like): X-component of data.
+        T (numpy.matrix or array_like): Rotational matrix or stack of
+            rotational matrices.
+        x (scalar or array_like): X-component of data, or (N, 3) array
+            of points.
         y (scalar or array_like): Y-component of data.
         z (scalar or array_like): Z-component of data.
 
     Returns:
-        Tuple (x, y, z) of data in cartesian coordinates.
+        For points, an (N, 3) array for a single matrix or a (K, N, 3)
+        array for a stack. For components, tuple (x, y, z) of data in
+        cartesian coordinates, each with a leading K axis for a stack.
     """
+    if y is None and z is None:
+        points = np.asarray(x)
+        T = np.asarray(T)
+        return np.matmul(points, np.swapaxes(T, -1, -2))
     x = np.asarray(x)
     y = np.asarray(y)
     z = np.asarray(z)
@@ -219,6 +489,13 @@ def mx_apply(T, x, y, z):
         y = y[None]
         z = z[None]
         scalar_input = True
+    if np.ndim(T) == 3:
+        v = np.stack(np.broadcast_arrays(x, y, z), axis=-1)
+        v_ = np.einsum('kij,...j->k...i', np.asarray(T), v)
+        x_, y_, z_ = v_[..., 0], v_[..., 1], v_[..., 2]
+        if scalar_input:
+            return (x_[:, 0], y_[:, 0], z_[:, 0])
+        return (x_, y_, z_)
     x_ = T[0, 0]*x+T[0, 1]*y+T[0, 2]*z
     y_ = T[1, 0]*x+T[1, 1]*y+T[1, 2]*z
     z_ = T[2, 0]*x+T[2, 1]*y+T[2, 2]*z
@@ -226,10 +503,81 @@ def mx_apply(T, x, y, z):
         return (x_.squeeze(), y_.squeeze(), z_.squeeze())
     return (x_, y_, z_)
 
+_libcxform = None
+
+def _load_libcxform(path=None):
+    """Loads the cxform library on first use and caches the handle.
+
+    Args:
+        path (str, optional): Library to load in place of the cxform-c
+            library next to this module, as Cxform_Check.py does with
+            its stub. Replaces the cached handle.
+
+    Returns:
+        ctypes.CDLL handle of the cxform library.
+    """
+    global _libcxform
+    if _libcxform is None or path is not None:
+        if path is not None:
+            libcxform_path = path
+        elif sys.platform == 'win32' or sys.platform == 'cygwin':
+            libcxform_path = os.path.join(
+                os.path.dirname(__file__), 'cxform-c.dll'
+            )
+        else:
+            libcxform_path = os.path.join(
+                os.path.dirname(__file__), 'cxform-c.so'
+            )
+        libcxform = ctypes.CDLL(libcxform_path)
+        libcxform.date2es.argtypes = [ctypes.c_int]*6
+        libcxform.date2es.restype = ctypes.c_double
+        libcxform.cxform.argtypes = [
+            ctypes.c_char_p, ctypes.c_char_p, ctypes.c_double,
+            ctypes.c_void_p, ctypes.c_void_p
+        ]
+        libcxform.cxform.restype = ctypes.c_long
+        _libcxform = libcxform
+    return _libcxform
+
+def _dates2es(libcxform, dt):
+    """Converts datetimes into ephemeris seconds, calling the library
+    once per distinct timestamp.
+
+    date2es takes whole seconds, so sub-second parts are dropped, as
+    the per-element conversion did by passing dt.second. The wall-clock
+    fields of a time zone aware datetime are used and its time zone is
+    ignored, also as before, rather than numpy's conversion to UTC.
+
+    Args:
+        libcxform (ctypes.CDLL): Handle of the cxform library.
+        dt (array_like of datetime): Datetimes, flattened.
+
+    Returns:
+        Numpy array of ephemeris seconds, one per datetime.
+    """
+    dt = np.asarray(dt)
+    if dt.dtype == object:
+        dt = np.array([
+            t.replace(tzinfo=None) if getattr(t, 'tzinfo', None) is not None else t
+            for t in dt.ravel()
+        ], dtype='datetime64[us]')
+    stamps = dt.astype('datetime64[s]')
+    unique, inverse = np.unique(stamps, return_inverse=True)
+    es = np.empty(unique.size, dtype=np.float64)
+    for i, t in enumerate(unique.astype(object)):
+        es[i] = libcxform.date2es(
+            t.year, t.month, t.day, t.hour, t.minute, t.second
+        )
+    return es[inverse.ravel()]
+
 def cxform(cs_from, cs_to, dt, x, y, z):
     """Performs conversion between various geocentric and heliocentric
     coordinate systems.
 
+    The library handle is loaded once and cached, dates are converted
+    once per distinct timestamp and the library writes its results
+    straight into the output array.
+
     Args:
         cs_from (str): Indentifier of the source coordinate system.
             Can be one of 'GEI', 'J2000', 'GEO', 'MAG', 'GSE', 'GSM',
@@ -246,15 +594,7 @@ def cxform(cs_from, cs_to, dt, x, y, z):
     Returns:
         Tuple (x, y, z) of data in target coordinate system.
     """
-    if sys.platform == 'wind32' or sys.platform == 'cygwin':
-        libcxform_path = os.path.join(
-            os.path.dirname(__file__), 'cxform-c.dll'
-        )
-    else:
-        libcxform_path = os.path.join(
-            os.path.dirname(__file__), 'cxform-c.so'
-        )
-    libcxform = ctypes.CDLL(libcxform_path)
+    libcxform = _load_libcxform()
     dt = np.asarray(dt)
     x_from = np.asarray(x)
     y_from = np.asarray(y)
@@ -270,33 +610,23 @@ def cxform(cs_from, cs_to, dt, x, y, z):
         y_from = y_from[None]
         z_from = z_from[None]
         scalar_input = True
-    x_to = np.empty(x_from.shape)
-    y_to = np.empty(y_from.shape)
-    z_to = np.empty(z_from.shape)
+    v_in = np.empty((dt.size, 3), dtype=np.float64)
+    v_in[:, 0] = x_from.ravel()
+    v_in[:, 1] = y_from.ravel()
+    v_in[:, 2] = z_from.ravel()
+    v_out = np.empty_like(v_in)
+    es = _dates2es(libcxform, dt.ravel()).tolist()
+    c_from = str.encode(cs_from)
+    c_to = str.encode(cs_to)
+    convert = libcxform.cxform
+    in_addr = v_in.ctypes.data
+    out_addr = v_out.ctypes.data
+    step = v_in.strides[0]
     for i in range(dt.size):
-        es = libcxform.date2es(
-            ctypes.c_int(dt.flat[i].year),
-            ctypes.c_int(dt.flat[i].month),
-            ctypes.c_int(dt.flat[i].day),
-            ctypes.c_int(dt.flat[i].hour),
-            ctypes.c_int(dt.flat[i].minute),
-            ctypes.c_int(dt.flat[i].second)
-        )
-        v_in = np.array(
-            [x_from.flat[i], y_from.flat[i], z_from.flat[i]],
-            dtype=np.float_
-        )
-        v_out = np.empty(3, dtype=np.float_)
-        libcxform.cxform(
-            str.encode(cs_from),
-            str.encode(cs_to),
-            ctypes.c_double(es),
-            v_in.ctypes.data_as(ctypes.POINTER(ctypes.c_double)),
-            v_out.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
-        )
-        x_to.flat[i] = v_out[0]
-        y_to.flat[i] = v_out[1]
-        z_to.flat[i] = v_out[2]
+        convert(c_from, c_to, es[i], in_addr + i*step, out_addr + i*step)
+    x_to = v_out[:, 0].reshape(dt.shape)
+    y_to = v_out[:, 1].reshape(dt.shape)
+    z_to = v_out[:, 2].reshape(dt.shape)
     if scalar_input:
         return (x_to.squeeze(), y_to.squeeze(), z_to.squeeze())
     return (x_to, y_to, z_to)
@@ -0,0 +1,14 @@
+# pytest entry point for the complexity regression check in Benchmark.py
+#
+# Runs every engine and the start-up check against Benchmark_Budget.json,
+# as python Benchmark.py does, and fails with its list of failures.
+
+import Benchmark as B
+
+
+def test_stages_scale_and_keep_budget(capsys):
+
+    status = B.main([])
+
+    output = capsys.readouterr().out
+    assert status == 0, output[output.rfind("FAILED"):]